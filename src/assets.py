@@ -0,0 +1,122 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from fileutil import atomic_open
+from manifest import hash_file, prune_empty_dirs
+from postprocess import is_processed_copy
+
+SYNC_JOBS = 8
+
+
+class SyncResult:
+
+    def __init__(self):
+        self.copied = []
+        self.skipped = []
+        self.removed = []
+
+    def __repr__(self):
+        return f"SyncResult(copied: {len(self.copied)}, skipped: {len(self.skipped)}, removed: {len(self.removed)})"
+
+
+def scan_files(root, relative_root=""):
+    # One scandir per directory: the entries carry their type and cached stat, no extra isfile/isdir calls
+    files = {}
+    with os.scandir(os.path.join(root, relative_root)) as entries:
+        for entry in entries:
+            relative_path = os.path.join(relative_root, entry.name)
+            if entry.is_dir(follow_symlinks=True):
+                files.update(scan_files(root, relative_path))
+            elif entry.is_file(follow_symlinks=True):
+                files[relative_path] = entry.stat()
+            else:
+                raise Exception(f"Error: Something went wrong with file at path {relative_path}")
+    return files
+
+
+def needs_copy(source, source_stat, destination, use_hash):
+    try:
+        destination_stat = os.stat(destination)
+    except FileNotFoundError:
+        return True
+
+    if source_stat.st_size != destination_stat.st_size:
+        return True
+    if source_stat.st_mtime_ns == destination_stat.st_mtime_ns:
+        return False
+    if use_hash and hash_file(source) == hash_file(destination):
+        # Same bytes, only the timestamp moved: sync it so the next run takes the fast path
+        os.utime(destination, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+        return False
+    return True
+
+
+def copy_file(source, destination, link=False):
+    if link:
+        # Hardlinks share bytes with static/, which is only safe while nothing edits docs/ in place
+        try:
+            if os.path.lexists(destination):
+                os.remove(destination)
+            os.link(source, destination)
+            return
+        except OSError:
+            pass
+
+    with open(source, "rb") as source_file, atomic_open(destination, "wb", buffering=0) as destination_file:
+        copy_file_contents(source_file, destination_file)
+    shutil.copystat(source, destination)
+
+
+def copy_file_contents(source_file, destination_file):
+    # copy_file_range stays in the kernel and can reflink on filesystems that support it
+    if hasattr(os, "copy_file_range"):
+        try:
+            while os.copy_file_range(source_file.fileno(), destination_file.fileno(), 1024 * 1024 * 64):
+                pass
+            return
+        except OSError:
+            source_file.seek(0)
+            destination_file.seek(0)
+            destination_file.truncate()
+    shutil.copyfileobj(source_file, destination_file)
+
+
+def sync_static(src, dst, manifest=None, jobs=SYNC_JOBS, use_hash=False, link=False):
+    if not os.path.exists(src):
+        raise ValueError(f"Error: {src} file location does not exist")
+    os.makedirs(dst, exist_ok=True)
+
+    result = SyncResult()
+    source_files = scan_files(src)
+
+    changed = []
+    for relative_path, source_stat in sorted(source_files.items()):
+        source = os.path.join(src, relative_path)
+        destination = os.path.join(dst, relative_path)
+        if manifest is not None and is_processed_copy(manifest, relative_path, source_stat, destination):
+            result.skipped.append(relative_path)
+        elif needs_copy(source, source_stat, destination, use_hash):
+            changed.append((source, destination))
+            result.copied.append(relative_path)
+        else:
+            result.skipped.append(relative_path)
+
+    for directory in sorted({os.path.dirname(destination) for _, destination in changed}):
+        os.makedirs(directory, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        for future in [executor.submit(copy_file, source, destination, link) for source, destination in changed]:
+            future.result()
+
+    if manifest is not None:
+        # Only files this stage copied before are pruned, generated pages in dst are left alone
+        for relative_path in sorted(set(manifest.assets) - set(source_files)):
+            destination = os.path.join(dst, relative_path)
+            if os.path.exists(destination):
+                os.remove(destination)
+                prune_empty_dirs(os.path.dirname(destination), dst)
+            result.removed.append(relative_path)
+        manifest.assets = {relative_path: [stat.st_size, stat.st_mtime_ns]
+                           for relative_path, stat in source_files.items()}
+
+    return result
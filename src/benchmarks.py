@@ -0,0 +1,341 @@
+import argparse
+import json
+import platform
+import random
+import re
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import block_markdown
+import inline_markdown
+import textnode
+from block_markdown import INLINE_CACHE_SIZE, configure_inline_cache, markdown_to_html_node
+from build_engine import build_pages, collect_pages
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import *
+from sitegen import SiteShape, generate_site, synthetic_page, synthetic_sentence
+
+REGRESSION_THRESHOLD = 0.15
+
+
+def best_time(function, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def synthetic_document(list_items):
+    # Long lists of short formatted items, the shape that made to_html slow on big posts
+    items = []
+    for i in range(list_items):
+        items.append(ParentNode("li", [
+            LeafNode(None, f"Item {i} with "),
+            LeafNode("b", "bold"),
+            LeafNode(None, " and a "),
+            LeafNode("a", "link", {"href": f"/items/{i}"}),
+        ]))
+    return ParentNode("div", [ParentNode("ul", items)])
+
+
+def bench_to_html(sizes, repeat=3):
+    results = []
+    for size in sizes:
+        document = synthetic_document(size)
+        elapsed = best_time(document.to_html, repeat)
+        results.append({"benchmark": "to_html", "size": size, "seconds": elapsed, "per_item": elapsed / size})
+    return results
+
+
+def chained_text_to_textnodes(text):
+    # The original five pass pipeline, kept as the reference the single pass lexer is measured against
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return nodes
+
+
+def inline_heavy_paragraphs(count, seed=0):
+    rng = random.Random(seed)
+    fragments = ["plain words here", "**bold text**", "_italic_", "`code()`",
+                 "[a link](/blog/post)", "![an image](/images/photo.png)", "more prose, and"]
+    return [" ".join(rng.choice(fragments) for _ in range(24)) for _ in range(count)]
+
+
+def bench_text_to_textnodes(count, repeat=5):
+    paragraphs = inline_heavy_paragraphs(count)
+    results = []
+    for name, function in (("inline_chained", chained_text_to_textnodes), ("inline_single_pass", text_to_textnodes)):
+        elapsed = best_time(lambda: [function(paragraph) for paragraph in paragraphs], repeat)
+        results.append({"benchmark": name, "size": count, "seconds": elapsed, "per_item": elapsed / count})
+    return results
+
+
+def bench_plain_text(count, repeat=5):
+    # Markup free prose, the common case: the trigger check against the full lexer, the
+    # precompiled link pattern against passing its raw string to re.findall (both without the
+    # "](" shortcut), and extract_markdown_links with the shortcut on its own row
+    rng = random.Random(0)
+    paragraphs = [synthetic_sentence(rng, 40, 0.0) for _ in range(count)]
+    link_pattern = inline_markdown.LINK_PATTERN
+    results = []
+    for name, function in (
+        ("inline_plain_lexer", lex_inline),
+        ("inline_plain_fast_path", text_to_textnodes),
+        ("extract_links_raw_pattern", lambda text: re.findall(link_pattern.pattern, text)),
+        ("extract_links_precompiled", link_pattern.findall),
+        ("extract_links_shortcut", extract_markdown_links),
+    ):
+        elapsed = best_time(lambda: [function(paragraph) for paragraph in paragraphs], repeat)
+        results.append({"benchmark": name, "size": count, "seconds": elapsed, "per_item": elapsed / count})
+    return results
+
+
+def bytes_per_object(factory, count):
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        objects = [None] * count
+        allocated, _ = tracemalloc.get_traced_memory()
+        for i in range(count):
+            objects[i] = factory()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (current - allocated) / count
+
+
+def synthetic_markdown(paragraphs, seed=0):
+    blocks = []
+    for i, paragraph in enumerate(inline_heavy_paragraphs(paragraphs, seed)):
+        blocks.append(f"## Section {i}" if i % 10 == 0 else paragraph)
+        if i % 5 == 0:
+            blocks.append("\n".join(f"- item {j} with **bold** text" for j in range(8)))
+    return "\n\n".join(blocks)
+
+
+class DictTextNode:
+    # The node classes as they were before __slots__, with a per-instance __dict__, kept as the
+    # reference the slotted classes are measured against
+
+    def __init__(self, text, texttype, url=None):
+        self.text = text
+        self.texttype = texttype
+        self.url = url
+
+
+class DictHTMLNode:
+
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictLeafNode(DictHTMLNode):
+
+    def __init__(self, tag, value, props=None):
+        super().__init__(tag, value, None, props)
+
+
+class DictParentNode(DictHTMLNode):
+
+    def __init__(self, tag, children, props=None):
+        super().__init__(tag, None, children, props)
+
+
+def document_memory(reference, paragraphs, traced):
+    # Runs in a fresh process, so peak RSS belongs to this one document. With reference set the
+    # parser builds the dict based nodes instead of the slotted ones
+    if reference:
+        textnode.LeafNode = DictLeafNode
+        inline_markdown.TextNode = block_markdown.TextNode = DictTextNode
+        block_markdown.ParentNode = DictParentNode
+    markdown = synthetic_markdown(paragraphs)
+    # Both are high-water marks, so the document need not be kept alive to be measured
+    if not traced:
+        markdown_to_html_node(markdown)
+        return peak_rss_kb()
+    tracemalloc.start()
+    try:
+        markdown_to_html_node(markdown)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def bench_node_memory(count, document_paragraphs=2000):
+    # Every measurement is taken for the slotted classes and for the dict based reference
+    results = []
+    factories = (
+        ("TextNode", lambda: TextNode("text", TextType.TEXT), lambda: DictTextNode("text", TextType.TEXT)),
+        ("LeafNode", lambda: LeafNode("b", "text"), lambda: DictLeafNode("b", "text")),
+        ("LeafNode+props", lambda: LeafNode("a", "text", {"href": "/x"}),
+         lambda: DictLeafNode("a", "text", {"href": "/x"})),
+        ("ParentNode", lambda: ParentNode("p", []), lambda: DictParentNode("p", [])),
+    )
+    for name, factory, reference in factories:
+        results.append({"benchmark": f"memory_{name}_dict", "size": count,
+                        "bytes_per_node": bytes_per_object(reference, count)})
+        results.append({"benchmark": f"memory_{name}", "size": count,
+                        "bytes_per_node": bytes_per_object(factory, count)})
+
+    for name, reference in (("memory_document_dict", True), ("memory_document", False)):
+        # One process per measurement: RSS only ever grows, and tracemalloc inflates it
+        peak_rss = in_fresh_process(document_memory, reference, document_paragraphs, False)
+        peak = in_fresh_process(document_memory, reference, document_paragraphs, True)
+        results.append({"benchmark": name, "size": document_paragraphs, "peak_traced_bytes": peak,
+                        "peak_rss_kb": peak_rss})
+    return results
+
+
+def peak_rss_kb():
+    # Linux carries ru_maxrss over exec, so a spawned worker would report the parent's peak;
+    # VmHWM starts over with the new process image
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def in_fresh_process(function, *args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(function, *args).result()
+
+
+def bench_site(shape, jobs=1, repeat=3):
+    # Times each pipeline layer over the same synthetic pages, then a full end to end build
+    rng = random.Random(shape.seed)
+    pages = [synthetic_page(rng, f"Page {i}", shape) for i in range(shape.pages)]
+    documents = [markdown_to_html_node(page) for page in pages]
+    fragments = [line for page in pages for line in page.split("\n")
+                 if line and not line.startswith(("#", "```", "    "))]
+
+    def parse_pages():
+        # A cold inline cache each round, otherwise every repeat after the first is all cache hits
+        configure_inline_cache(INLINE_CACHE_SIZE)
+        return [markdown_to_html_node(page) for page in pages]
+
+    results = []
+    for name, function, size in (
+        ("site_markdown_to_html_node", parse_pages, len(pages)),
+        ("site_text_to_textnodes", lambda: [text_to_textnodes(fragment) for fragment in fragments], len(fragments)),
+        ("site_to_html", lambda: [document.to_html() for document in documents], len(documents)),
+    ):
+        elapsed = best_time(function, repeat)
+        results.append({"benchmark": name, "size": size, "seconds": elapsed, "per_item": elapsed / size})
+
+    with tempfile.TemporaryDirectory() as root:
+        site = generate_site(root, shape)
+
+        def build():
+            docs = tempfile.mkdtemp(dir=root)
+            build_pages(collect_pages(site["content"], docs), site["template"], "/", jobs)
+
+        elapsed = best_time(build, repeat)
+    results.append({"benchmark": f"site_build_jobs{jobs}", "size": shape.pages, "seconds": elapsed,
+                    "per_item": elapsed / shape.pages})
+    return results
+
+
+def compare_results(results, baseline, threshold=REGRESSION_THRESHOLD):
+    baseline_times = {(result["benchmark"], result["size"]): result["seconds"]
+                      for result in baseline["results"] if "seconds" in result}
+    comparisons = []
+    for result in results:
+        key = (result["benchmark"], result.get("size"))
+        if "seconds" not in result or key not in baseline_times:
+            continue
+        ratio = result["seconds"] / baseline_times[key]
+        comparisons.append({"benchmark": result["benchmark"], "size": result["size"],
+                            "ratio": ratio, "regression": ratio > 1 + threshold})
+    return comparisons
+
+
+def results_document(results, shape=None):
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "shape": shape.as_dict() if shape is not None else None,
+        "results": results,
+    }
+
+
+def print_results(results):
+    for result in results:
+        if "seconds" not in result:
+            details = "  ".join(f"{key}={value:.1f}" if isinstance(value, float) else f"{key}={value}"
+                                for key, value in result.items() if key != "benchmark")
+            print(f" {result['benchmark']:<28} {details}")
+            continue
+        print(f" {result['benchmark']:<28} size={result['size']:<8} {result['seconds'] * 1000:10.3f} ms  {result['per_item'] * 1e6:8.3f} us/item")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the static site generator")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--paragraphs", type=int, default=12)
+    parser.add_argument("--inline-density", type=float, default=0.2)
+    parser.add_argument("--list-length", type=int, default=6)
+    parser.add_argument("--code-lines", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--micro", action="store_true",
+                        help="also run the to_html scaling, inline lexer and node memory benchmarks")
+    parser.add_argument("--output", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against results saved with --output")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="slowdown ratio above 1 that counts as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    shape = SiteShape(args.pages, args.depth, args.paragraphs, args.inline_density,
+                      args.list_length, args.code_lines, args.seed)
+
+    results = bench_site(shape, args.jobs, args.repeat)
+    if args.micro:
+        results += bench_to_html([1000, 10000, 100000], args.repeat)
+        results += bench_text_to_textnodes(5000, args.repeat)
+        results += bench_plain_text(20000, args.repeat)
+        results += bench_node_memory(100000)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results_document(results, shape), file, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            comparisons = compare_results(results, json.load(file), args.threshold)
+        for comparison in comparisons:
+            marker = "REGRESSION" if comparison["regression"] else "ok"
+            print(f" {comparison['benchmark']:<28} size={comparison['size']:<8} {comparison['ratio']:6.2f}x  {marker}")
+        if any(comparison["regression"] for comparison in comparisons):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,7 +1,10 @@
 from textnode import *
 from htmlnode import *
 from inline_markdown import text_to_textnodes
-import re
+from functools import lru_cache
+from profiling import stage
+
+INLINE_CACHE_SIZE = 4096
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -12,15 +15,97 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 def markdown_to_blocks(markdown):
-    split_blocks = markdown.split("\n\n")
-    full_blocks = []
-    for block in split_blocks:
-        block = block.strip()
-        if not block:
+    return [block for _, block in iter_blocks(markdown.split("\n"))]
+
+def iter_blocks(lines):
+    for _, block_type, block in iter_numbered_blocks(lines):
+        yield block_type, block
+
+def iter_numbered_blocks(lines, first_line=1):
+    # Reads markdown one line at a time (a list, a generator or an open file) and lazily yields
+    # (line number, BlockType, block) with the number of the block's first line. Each block is
+    # classified while its lines are consumed, and fenced code keeps its blank lines instead of
+    # being cut into paragraphs.
+    block_lines = []
+    block_type = None
+    block_start = first_line
+    in_code = False
+    for number, line in enumerate(lines, first_line):
+        line = line.rstrip("\n")
+        if in_code:
+            block_lines.append(line)
+            # Only a line that is just the fence closes it, "foo```" is still code
+            if line.strip() == "```":
+                yield block_start, BlockType.CODE, "\n".join(block_lines).strip()
+                block_lines = []
+                in_code = False
+            continue
+
+        if not line.strip():
+            if block_lines:
+                yield (block_start, *finish_block(block_type, block_lines))
+                block_lines = []
+            continue
+
+        if not block_lines:
+            line = line.lstrip()
+            block_lines.append(line)
+            block_start = number
+            if line.startswith("```"):
+                # A one-line block needs its own closing fence, "```" or "````" only opens one
+                fence = line.rstrip()
+                if len(fence) >= 6 and fence.endswith("```"):
+                    yield block_start, BlockType.CODE, fence
+                    block_lines = []
+                else:
+                    in_code = True
+                continue
+            block_type = first_line_block_type(line)
             continue
-        full_blocks.append(block)
 
-    return full_blocks
+        block_lines.append(line)
+        if not line_continues_block(block_type, line, len(block_lines)):
+            block_type = BlockType.PARAGRAPH
+
+    if in_code:
+        # An unclosed fence is not code, fall back to plain blank line separated blocks
+        for chunk in "\n".join(block_lines).split("\n\n"):
+            block = chunk.strip()
+            if block:
+                leading = chunk[:len(chunk) - len(chunk.lstrip())]
+                yield block_start + leading.count("\n"), block_to_block_type(block), block
+            block_start += chunk.count("\n") + 2
+    elif block_lines:
+        yield (block_start, *finish_block(block_type, block_lines))
+
+def first_line_block_type(line):
+    if line.startswith("#"):
+        return BlockType.HEADING
+    if line.startswith(">"):
+        return BlockType.QUOTE
+    if line.startswith("- "):
+        return BlockType.UNORDERED_LIST
+    if line.startswith("1. "):
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+def line_continues_block(block_type, line, line_number):
+    match block_type:
+        case BlockType.QUOTE:
+            return line.startswith(">")
+        case BlockType.UNORDERED_LIST:
+            return line.startswith("- ")
+        case BlockType.ORDERED_LIST:
+            return line.startswith(f"{line_number}. ")
+        case _:
+            return True
+
+def finish_block(block_type, block_lines):
+    # Blocks are stripped, so the last line is only checked once its trailing whitespace is gone
+    block_lines[-1] = block_lines[-1].rstrip()
+    if not line_continues_block(block_type, block_lines[-1], len(block_lines)):
+        block_type = BlockType.PARAGRAPH
+    return block_type, "\n".join(block_lines)
 
 def block_to_block_type(block):
     split_lines = block.split("\n")
@@ -50,17 +135,45 @@ def block_to_block_type(block):
     return BlockType.PARAGRAPH
 
 def markdown_to_html_node(markdown):
-    markdown_block = markdown_to_blocks(markdown)
+    return markdown_lines_to_html_node(markdown.split("\n"))
+
+def markdown_lines_to_html_node(lines, links=None, first_line=1):
+    # links, when given, collects (line number, url) for every link and image the page renders
     children = []
 
-    for block in markdown_block:
-        html_node = block_to_html_node(block)
+    for start, block_type, block in iter_numbered_blocks(lines, first_line):
+        html_node = block_to_html_node(block, block_type)
         children.append(html_node)
+        if links is not None:
+            collect_links(html_node, block, start, links)
 
     return ParentNode("div", children, None)
 
-def block_to_html_node(block):
-    block_type = block_to_block_type(block)
+def collect_links(html_node, block, start, links):
+    # Urls come from the rendered a and img nodes, so links inside code are never picked up and
+    # a label wrapped over two lines still is. The line is where the url appears in the block.
+    position = 0
+    stack = [html_node]
+    while stack:
+        node = stack.pop()
+        if node.children is not None:
+            stack.extend(reversed(node.children))
+            continue
+        url = None
+        if node.tag == "a":
+            url = node.props.get("href")
+        elif node.tag == "img":
+            url = node.props.get("src")
+        if url is None:
+            continue
+        found = block.find("](" + url, position)
+        if found != -1:
+            position = found
+        links.append((start + block.count("\n", 0, position), url))
+
+def block_to_html_node(block, block_type=None):
+    if block_type is None:
+        block_type = block_to_block_type(block)
     match block_type:
         case BlockType.PARAGRAPH:
             return paragraph_to_html_node(block)
@@ -137,10 +250,25 @@ def unordered_list_to_html_node(block):
     return ParentNode("ul", html_nodes)
 
 def text_to_children(text):
+    with stage("inline parsing"):
+        return list(cached_text_to_children(text))
+
+def build_text_children(text):
     inline_markdown = text_to_textnodes(text)
     children = []
     for textnode in inline_markdown:
         html_node = text_node_to_html_node(textnode)
         children.append(html_node)
 
-    return children
\ No newline at end of file
+    # A tuple of immutable LeafNodes, so cached results can be handed to any number of pages
+    return tuple(children)
+
+# Repeated paragraphs, list items and quotes (disclaimers, footers, nav lists) are parsed once
+cached_text_to_children = lru_cache(maxsize=INLINE_CACHE_SIZE)(build_text_children)
+
+def configure_inline_cache(maxsize):
+    global cached_text_to_children
+    cached_text_to_children = lru_cache(maxsize=maxsize)(build_text_children)
+
+def inline_cache_info():
+    return cached_text_to_children.cache_info()
\ No newline at end of file
@@ -0,0 +1,264 @@
+import io
+import os
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from block_markdown import INLINE_CACHE_SIZE, configure_inline_cache, inline_cache_info
+from depgraph import asset_dependencies, invalidate
+from fingerprint import table_key
+from generate import generate_page, render_markdown
+from manifest import hash_file
+from pipeline import BackgroundWriter, prefetch, read_text
+import profiling
+from template import Template
+
+
+class PageResult:
+
+    def __init__(self, source, output, error=None, skipped=False, cache_hits=0, cache_misses=0,
+                 parse_cache_hits=0, parse_cache_misses=0):
+        self.source = source
+        self.output = output
+        self.error = error
+        self.skipped = skipped
+        self.cache_hits = cache_hits
+        self.cache_misses = cache_misses
+        self.parse_cache_hits = parse_cache_hits
+        self.parse_cache_misses = parse_cache_misses
+        self.timings = None
+        self.trace_events = None
+        self.metadata = None
+        self.links = ()
+        self.reasons = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def title(self):
+        return self.metadata["title"] if self.metadata is not None else None
+
+    @property
+    def summary(self):
+        return self.metadata.get("summary", "") if self.metadata is not None else ""
+
+    def __repr__(self):
+        return f"PageResult({self.source}, {self.output}, error={self.error is not None}, skipped={self.skipped})"
+
+
+def collect_pages(content_directory, destination_directory):
+    pages = []
+    # Sorted so the work list, and therefore logs and errors, come out in the same order every run
+    for file in sorted(os.listdir(content_directory)):
+        full_path = os.path.join(content_directory, file)
+        dest_path = os.path.join(destination_directory, file)
+        if os.path.isfile(full_path):
+            pages.append((full_path, str(Path(dest_path).with_suffix(".html"))))
+        elif os.path.isdir(full_path):
+            pages.extend(collect_pages(full_path, dest_path))
+
+    return pages
+
+
+def page_output(source, content_directory, destination_directory):
+    relative_path = os.path.relpath(source, content_directory)
+    return str(Path(os.path.join(destination_directory, relative_path)).with_suffix(".html"))
+
+
+def init_worker(inline_cache_size, profile=False, trace=False):
+    configure_inline_cache(inline_cache_size)
+    if profile:
+        profiling.install_profiler(profiling.BuildProfiler(trace))
+
+
+def render_page(source, output, template, ship_timings=False, parse_cache=None, cache_key=None,
+                text=None, writer=None):
+    # Cache counters and profiles are per process, so worker results carry their page's share
+    profiler = profiling.active_profiler
+    before = inline_cache_info()
+    parse_before = (parse_cache.hits, parse_cache.misses) if parse_cache is not None else (0, 0)
+    try:
+        if writer is not None:
+            # Pipelined: the source was prefetched and the finished page is handed to the writer thread
+            metadata, page = render_markdown(io.StringIO(text), template, parse_cache, cache_key)
+            writer.write(source, output, page)
+        elif profiler is None:
+            metadata = generate_page(source, template, output, parse_cache, cache_key)
+        else:
+            with profiler.page(source):
+                metadata = generate_page(source, template, output, parse_cache, cache_key)
+        # The links the parser found become the page's asset edges in the dependency graph and
+        # feed the link check; the content index keeps them apart from the rest of the metadata
+        links = [tuple(link) for link in metadata.pop("links")]
+        error = None
+    except Exception:
+        metadata, links = None, ()
+        error = traceback.format_exc()
+    after = inline_cache_info()
+    parse_after = (parse_cache.hits, parse_cache.misses) if parse_cache is not None else (0, 0)
+    result = PageResult(source, output, error,
+                        cache_hits=after.hits - before.hits,
+                        cache_misses=after.misses - before.misses,
+                        parse_cache_hits=parse_after[0] - parse_before[0],
+                        parse_cache_misses=parse_after[1] - parse_before[1])
+    result.metadata = metadata
+    result.links = links
+    if profiler is not None and ship_timings:
+        result.timings, result.trace_events = profiler.take_page(source)
+    return result
+
+
+def render_pipelined(pending, template, parse_cache=None, cache_keys=None):
+    # Rendering stays on this thread while a reader thread prefetches upcoming sources and a
+    # writer thread flushes finished pages, so slow disks no longer leave the CPU idle. Each
+    # source and page is held whole in memory, up to the depth of the queues. A result is only
+    # handed on once its page is on disk, so a failed write is on the result before anything
+    # (sitemap, feed, search index) sees the page.
+    cache_keys = cache_keys or {}
+    waiting = deque()
+    with BackgroundWriter() as writer:
+        for (source, output), text, error in prefetch(pending, lambda page: read_text(page[0])):
+            if error is None:
+                waiting.append(render_page(source, output, template, False, parse_cache,
+                                           cache_keys.get(source), text, writer))
+            else:
+                waiting.append(PageResult(source, output, error))
+            yield from settled(waiting, writer)
+    yield from settled(waiting, writer)
+
+
+def settled(waiting, writer):
+    # Results at the front of waiting whose write has finished, or which never got to one
+    while waiting:
+        result = waiting[0]
+        if result.ok and result.source not in writer.finished:
+            return
+        waiting.popleft()
+        if result.source in writer.errors:
+            result.error = writer.errors[result.source]
+        yield result
+
+
+def render_in_pool(pending, template, jobs, inline_cache_size, parse_cache=None, cache_keys=None):
+    profiler = profiling.active_profiler
+    cache_keys = cache_keys or {}
+    initargs = (inline_cache_size, profiler is not None, profiler is not None and profiler.trace)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=initargs) as executor:
+        futures = [(source, executor.submit(render_page, source, output, template, True,
+                                            parse_cache, cache_keys.get(source)))
+                   for source, output in pending]
+        for source, future in futures:
+            result = future.result()
+            if profiler is not None and result.timings is not None:
+                profiler.merge_page(source, result.timings, result.trace_events)
+            yield result
+
+
+def summarize(results):
+    summary = {"built": 0, "skipped": 0, "failed": 0, "cache_hits": 0, "cache_misses": 0,
+               "parse_cache_hits": 0, "parse_cache_misses": 0}
+    for result in results:
+        if result.skipped:
+            summary["skipped"] += 1
+        elif result.ok:
+            summary["built"] += 1
+        else:
+            summary["failed"] += 1
+        summary["cache_hits"] += result.cache_hits
+        summary["cache_misses"] += result.cache_misses
+        summary["parse_cache_hits"] += result.parse_cache_hits
+        summary["parse_cache_misses"] += result.parse_cache_misses
+    return summary
+
+
+def build_pages(pages, template_path, base_path, jobs=1, manifest=None, *, inline_cache_size=INLINE_CACHE_SIZE,
+                parse_cache=None, on_result=None, index=None, assets=None, images=None, pipeline=False,
+                minify=False):
+    results = {}
+    pending = []
+    source_hashes = {}
+    cache_keys = {}
+
+    template = Template.load(template_path, base_path, assets, images)
+    if manifest is not None:
+        template_hash = hash_file(template_path)
+        if assets:
+            # Turning fingerprinting on or off, or a new name for an asset the chrome references,
+            # changes every page just like an edit to the template. Assets referenced from content
+            # are covered by each page's own asset edges
+            template_hash += ":" + table_key(template.asset_urls)
+        if images:
+            # Likewise for responsive images being turned on or off or resized differently; a
+            # changed image reaches the pages using it through their asset edges
+            template_hash += ":images:" + ",".join(sorted({image["settings"] for image in images.values()}))
+        if minify:
+            # Pages are minified in place after the build, so turning minify off has to rewrite them
+            template_hash += ":minify"
+
+    if manifest is not None or parse_cache is not None:
+        for source, _ in pages:
+            source_hashes[source] = hash_file(source)
+    if manifest is not None:
+        stale = invalidate(pages, manifest, source_hashes, template_hash, base_path)
+    else:
+        stale = {source: ["no manifest"] for source, _ in pages}
+    if index is not None:
+        # Skipped pages are described by their index entry, so a page without one is rebuilt
+        for source, _ in pages:
+            if source not in stale and source not in index:
+                stale[source] = ["not in the content index"]
+
+    assets_key = table_key(assets) + table_key(images)
+    for source, output in pages:
+        if source in stale:
+            if parse_cache is not None:
+                cache_keys[source] = parse_cache.key(source_hashes[source], base_path, assets_key)
+            pending.append((source, output))
+
+    if jobs <= 1 or len(pending) <= 1:
+        configure_inline_cache(inline_cache_size)
+        if pipeline and profiling.active_profiler is None and len(pending) > 1:
+            # Still one process, with reads and writes overlapped on threads
+            rendered = render_pipelined(pending, template, parse_cache, cache_keys)
+        else:
+            # Serial fallback: everything runs in this process and thread, which keeps pdb and
+            # tracebacks simple, and every page streams straight from its source into its output
+            rendered = (render_page(source, output, template, False, parse_cache, cache_keys.get(source))
+                        for source, output in pending)
+    else:
+        rendered = render_in_pool(pending, template, jobs, inline_cache_size, parse_cache, cache_keys)
+
+    # Results are handed to on_result in page order as soon as each one is ready, so outputs
+    # derived from every page (sitemap, feed, search index) are streamed during the build
+    for source, output in pages:
+        if source in stale:
+            result = next(rendered)
+            result.reasons = stale[source]
+        else:
+            result = PageResult(source, output, skipped=True)
+            if index is not None:
+                result.metadata = index.get(source).metadata
+                result.links = index.get(source).links
+        results[source] = result
+        if on_result is not None:
+            on_result(result)
+    for _ in rendered:
+        pass
+
+    for source, output in pending:
+        result = results[source]
+        if not result.ok:
+            continue
+        if manifest is not None:
+            urls = [url for _, url in result.links]
+            manifest.record(source, source_hashes[source], template_hash, output, base_path,
+                            asset_dependencies(urls, manifest.assets))
+        if index is not None:
+            index.record(source, output, result.metadata, source_hashes.get(source), result.links)
+
+    if parse_cache is not None:
+        parse_cache.trim()
+
+    return [results[source] for source, _ in pages]
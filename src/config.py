@@ -0,0 +1,101 @@
+import json
+import os
+
+CONFIG_FILENAME = "site.json"
+OUTPUT_MODES = ("incremental", "clean")
+
+# Every setting a build reads, with its default. Relative paths are resolved against the
+# directory of the config file that set them, or the working directory for defaults and flags.
+DEFAULTS = {
+    "content": "content",
+    "static": "static",
+    "output": "docs",
+    "template": "template.html",
+    "base_path": "/",
+    "jobs": os.cpu_count() or 1,
+    "pipeline": False,
+    "cache_dir": ".cache",
+    "output_mode": "incremental",
+    "site_url": "",
+    "site_title": "",
+    "feed_section": "blog",
+    "listing_sections": ["blog"],
+    "listing_page_size": 10,
+    "minify": False,
+    "compress": False,
+    "fingerprint": False,
+    "responsive_images": False,
+    "image_widths": [480, 960, 1440],
+    "image_webp": False,
+}
+PATH_SETTINGS = ("content", "static", "output", "template", "cache_dir")
+
+
+class ConfigError(Exception):
+    pass
+
+
+class SiteConfig:
+
+    def __init__(self, **settings):
+        unknown = set(settings) - set(DEFAULTS)
+        if unknown:
+            raise ConfigError(f"Unknown setting(s): {', '.join(sorted(unknown))}")
+
+        for name, default in DEFAULTS.items():
+            setattr(self, name, settings.get(name, default))
+
+        if self.output_mode not in OUTPUT_MODES:
+            raise ConfigError(f"output_mode must be one of {', '.join(OUTPUT_MODES)}, not {self.output_mode!r}")
+        if not isinstance(self.jobs, int) or self.jobs < 1:
+            raise ConfigError(f"jobs must be a positive integer, not {self.jobs!r}")
+        if not isinstance(self.listing_page_size, int) or self.listing_page_size < 1:
+            raise ConfigError(f"listing_page_size must be a positive integer, not {self.listing_page_size!r}")
+        if not isinstance(self.listing_sections, list) or not all(isinstance(section, str)
+                                                                  for section in self.listing_sections):
+            raise ConfigError(f"listing_sections must be a list of content directories, not {self.listing_sections!r}")
+        if not isinstance(self.image_widths, list) or not all(isinstance(width, int) and width > 0
+                                                              for width in self.image_widths):
+            raise ConfigError(f"image_widths must be a list of positive integers, not {self.image_widths!r}")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as file:
+            try:
+                data = json.load(file)
+            except json.JSONDecodeError as error:
+                raise ConfigError(f"{path} is not valid JSON: {error}")
+        if not isinstance(data, dict):
+            raise ConfigError(f"{path} must contain a JSON object")
+
+        return cls(**resolve_paths(data, os.path.dirname(os.path.abspath(path))))
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.cache_dir, "manifest.json")
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in DEFAULTS}
+
+    def __repr__(self):
+        return f"SiteConfig({self.as_dict()})"
+
+
+def resolve_paths(settings, root):
+    resolved = dict(settings)
+    for name in PATH_SETTINGS:
+        if resolved.get(name) is not None:
+            resolved[name] = os.path.join(root, resolved[name])
+    return resolved
+
+
+def build_config(config_path=None, **overrides):
+    # Defaults, then the config file, then command line flags; a None override means unset
+    settings = dict(DEFAULTS)
+    if config_path is None and os.path.exists(CONFIG_FILENAME):
+        config_path = CONFIG_FILENAME
+    if config_path is not None:
+        settings = SiteConfig.load(config_path).as_dict()
+
+    settings.update({name: value for name, value in overrides.items() if value is not None})
+    return SiteConfig(**resolve_paths(settings, os.getcwd()))
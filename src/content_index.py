@@ -0,0 +1,121 @@
+import json
+import os
+from datetime import datetime, timezone
+from fileutil import atomic_open
+
+INDEX_VERSION = 1
+
+
+class IndexEntry:
+    # One row of the content index, slotted like the node classes because there is one per page
+    __slots__ = ("source", "output", "title", "summary", "words", "front_matter", "hash", "links", "mtime")
+    FIELDS = __slots__
+
+    def __init__(self, source, output, title, summary="", words=0, front_matter=None, hash=None, links=(), mtime=0.0):
+        self.source = source
+        self.output = output
+        self.title = title
+        self.summary = summary
+        self.words = words
+        self.front_matter = front_matter or {}
+        self.hash = hash
+        self.links = [tuple(link) for link in links]
+        self.mtime = mtime
+
+    @property
+    def metadata(self):
+        return {"title": self.title, "summary": self.summary, "words": self.words, "front_matter": self.front_matter}
+
+    @property
+    def date(self):
+        # The front matter date when there is one, otherwise the day the source was last modified
+        date = self.front_matter.get("date")
+        if isinstance(date, str) and date:
+            return date
+        return datetime.fromtimestamp(self.mtime, timezone.utc).strftime("%Y-%m-%d")
+
+    @property
+    def tags(self):
+        tags = self.front_matter.get("tags", [])
+        return [tags] if isinstance(tags, str) else list(tags)
+
+    def as_row(self):
+        return [getattr(self, field) for field in self.FIELDS]
+
+    def __eq__(self, other):
+        return isinstance(other, IndexEntry) and self.as_row() == other.as_row()
+
+    def __repr__(self):
+        return f"IndexEntry({self.source}, {self.title!r}, words={self.words})"
+
+
+class ContentIndex:
+    # Build-wide table of every page's metadata, filled in as pages are parsed and kept between
+    # builds, so listings, feeds and the link check never reread or reparse unchanged markdown
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+
+    @classmethod
+    def load(cls, path):
+        index = cls(path)
+        if not os.path.exists(path):
+            return index
+
+        with open(path, "r", encoding="utf-8") as file:
+            try:
+                data = json.load(file)
+            except json.JSONDecodeError:
+                return index
+
+        # Rows are stored positionally, so any change to the columns starts a fresh index
+        if data.get("version") == INDEX_VERSION and data.get("fields") == list(IndexEntry.FIELDS):
+            for row in data.get("pages", []):
+                entry = IndexEntry(*row)
+                index.entries[entry.source] = entry
+        return index
+
+    def save(self):
+        with atomic_open(self.path) as file:
+            json.dump({
+                "version": INDEX_VERSION,
+                "fields": list(IndexEntry.FIELDS),
+                "pages": [self.entries[source].as_row() for source in sorted(self.entries)],
+            }, file, ensure_ascii=False, separators=(",", ":"))
+
+    def record(self, source, output, metadata, source_hash=None, links=(), mtime=None):
+        if mtime is None:
+            mtime = os.stat(source).st_mtime
+        entry = IndexEntry(source, str(output), metadata["title"], metadata.get("summary", ""),
+                           metadata.get("words", 0), metadata.get("front_matter"), source_hash, links, mtime)
+        self.entries[source] = entry
+        return entry
+
+    def get(self, source):
+        return self.entries.get(source)
+
+    def remove(self, sources):
+        return [source for source in sources if self.entries.pop(source, None) is not None]
+
+    def retain(self, sources):
+        sources = set(sources)
+        return self.remove([source for source in self.entries if source not in sources])
+
+    def in_directory(self, directory):
+        # Pages below directory, not counting its own index page
+        prefix = os.path.join(directory, "")
+        return [entry for source, entry in sorted(self.entries.items())
+                if source.startswith(prefix) and os.path.dirname(source) != directory]
+
+    def tagged(self, tag):
+        return [entry for _, entry in sorted(self.entries.items()) if tag in entry.tags]
+
+    def __contains__(self, source):
+        return source in self.entries
+
+    def __iter__(self):
+        return iter(self.entries[source] for source in sorted(self.entries))
+
+    def __len__(self):
+        return len(self.entries)
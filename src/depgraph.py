@@ -0,0 +1,37 @@
+# The manifest is the dependency graph: every page entry records the source and template hashes
+# it was built from and the static assets it references with their size and mtime. This module
+# fills those edges in and walks them to find what to rebuild. Pages that list other pages, the
+# listings, are generated from the content index and track their own html instead.
+
+
+def asset_dependencies(urls, assets):
+    # Only root-relative urls can name a static file, query strings and fragments aside
+    dependencies = {}
+    for url in urls:
+        if not url.startswith("/") or url.startswith("//"):
+            continue
+        asset = url[1:].split("#", 1)[0].split("?", 1)[0]
+        if asset in assets:
+            dependencies[asset] = assets[asset]
+    return dependencies
+
+
+def invalidate(pages, manifest, source_hashes, template_hash, base_path):
+    # Minimal rebuild set as {source: [reasons]}: the pages whose own dependencies changed
+    stale = {}
+    for source, output in pages:
+        reasons = manifest.stale_reasons(source, source_hashes[source], template_hash, output, base_path)
+        if reasons:
+            stale[source] = reasons
+    return stale
+
+
+def affected_sources(manifest, sources, assets):
+    # Sources that could be stale after the given sources and static assets changed on disk,
+    # for callers such as the watcher that know what changed and want to avoid a full scan
+    affected = set(sources)
+    assets = set(assets)
+    for source, entry in manifest.pages.items():
+        if assets.intersection(entry.get("assets", ())):
+            affected.add(source)
+    return sorted(affected)
@@ -0,0 +1,121 @@
+import json
+import os
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape, quoteattr
+from fileutil import atomic_open
+
+SITEMAP_FILENAME = "sitemap.xml"
+FEED_FILENAME = "feed.xml"
+SEARCH_INDEX_FILENAME = "search.json"
+
+
+def page_url(output, output_root, base_path="/"):
+    # Url path of a page as served, index.html pages by their directory
+    path = os.path.relpath(output, output_root).replace(os.sep, "/")
+    if path == "index.html":
+        path = ""
+    elif path.endswith("/index.html"):
+        path = path[:-len("index.html")]
+    return base_path + path
+
+
+def timestamp(path):
+    return datetime.fromtimestamp(os.stat(path).st_mtime, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SiteFeeds:
+    # sitemap.xml, an Atom feed of one content section and a search index, opened before the
+    # build and appended to as each page result arrives, so nothing rereads content/ afterwards.
+    # The sitemap and feed need absolute urls and are only written when site_url is set.
+
+    def __init__(self, output_root, content_root, base_path="/", site_url="", title="", section="blog"):
+        self.output_root = output_root
+        self.content_root = content_root
+        self.base_path = base_path
+        self.site_url = site_url.rstrip("/")
+        self.title = title
+        self.section = section
+        self.sitemap = None
+        self.feed = None
+        self.search_index = None
+        self.search_entries = 0
+        self.stack = ExitStack()
+
+    def in_section(self, source):
+        relative_path = os.path.relpath(source, self.content_root)
+        return relative_path.startswith(self.section + os.sep)
+
+    def open(self, pages):
+        if self.site_url:
+            self.sitemap = self.stack.enter_context(atomic_open(os.path.join(self.output_root, SITEMAP_FILENAME)))
+            self.sitemap.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                               '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+
+            # The feed header needs its newest entry before any entry is known, the sources tell us
+            updated = max((timestamp(source) for source, _ in pages if self.in_section(source)), default=None)
+            if updated is not None:
+                feed_id = self.site_url + self.base_path + self.section + "/"
+                self.feed = self.stack.enter_context(atomic_open(os.path.join(self.output_root, FEED_FILENAME)))
+                self.feed.write('<?xml version="1.0" encoding="utf-8"?>\n'
+                                '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+                                f" <title>{escape(self.title or self.section)}</title>\n"
+                                f" <id>{escape(feed_id)}</id>\n"
+                                f" <link href={quoteattr(feed_id)}/>\n"
+                                f" <link rel=\"self\" href={quoteattr(self.site_url + self.base_path + FEED_FILENAME)}/>\n"
+                                f" <updated>{updated}</updated>\n")
+
+        self.search_index = self.stack.enter_context(
+            atomic_open(os.path.join(self.output_root, SEARCH_INDEX_FILENAME)))
+        self.search_index.write("[")
+        return self
+
+    def add(self, result):
+        if not result.ok or result.title is None:
+            return
+        url = page_url(result.output, self.output_root, self.base_path)
+
+        if self.sitemap is not None or self.feed is not None:
+            updated = timestamp(result.source)
+            location = escape(self.site_url + url)
+            if self.sitemap is not None:
+                self.sitemap.write(f" <url><loc>{location}</loc><lastmod>{updated[:10]}</lastmod></url>\n")
+            if self.feed is not None and self.in_section(result.source):
+                self.feed.write(" <entry>\n"
+                                f"  <title>{escape(result.title)}</title>\n"
+                                f"  <link href={quoteattr(self.site_url + url)}/>\n"
+                                f"  <id>{location}</id>\n"
+                                f"  <updated>{updated}</updated>\n"
+                                f"  <summary>{escape(result.summary)}</summary>\n"
+                                " </entry>\n")
+
+        entry = json.dumps({"url": url, "title": result.title, "summary": result.summary}, ensure_ascii=False)
+        self.search_index.write(("\n " if self.search_entries == 0 else ",\n ") + entry)
+        self.search_entries += 1
+
+    def add_listing(self, output):
+        # Listing, tag and archive pages only go in the sitemap. The search index is left to the
+        # pages themselves, which the listings only repeat the titles and summaries of
+        if self.sitemap is not None:
+            location = escape(self.site_url + page_url(output, self.output_root, self.base_path))
+            self.sitemap.write(f" <url><loc>{location}</loc><lastmod>{timestamp(output)[:10]}</lastmod></url>\n")
+
+    def close(self):
+        if self.sitemap is not None:
+            self.sitemap.write("</urlset>\n")
+        if self.feed is not None:
+            self.feed.write("</feed>\n")
+        if self.search_index is not None:
+            self.search_index.write("\n]\n")
+        self.stack.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        # On failure the half written files are dropped and the previous ones stay in place
+        if exc_type is None:
+            self.close()
+        else:
+            self.stack.__exit__(exc_type, exc, traceback)
+        return False
@@ -0,0 +1,26 @@
+import os
+import tempfile
+from contextlib import contextmanager
+
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+@contextmanager
+def atomic_open(path, mode="w", buffering=WRITE_BUFFER_SIZE):
+    # Writes land in a temp file beside the destination and are renamed over it on success,
+    # so readers never see a half written file and failures leave the old file in place
+    directory = os.path.dirname(path)
+    if directory != "":
+        os.makedirs(directory, exist_ok=True)
+
+    fd, temp_path = tempfile.mkstemp(dir=directory or ".", prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        encoding = None if "b" in mode else "utf-8"
+        with open(fd, mode, buffering=buffering, encoding=encoding) as file:
+            yield file
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+from assets import copy_file
+from fileutil import atomic_open
+from manifest import hash_file, prune_empty_dirs
+
+ASSET_MANIFEST_FILENAME = "asset-manifest.json"
+FINGERPRINT_LENGTH = 10
+# Assets that pages and the template reference. Files fetched by a fixed name, like favicon.ico
+# or robots.txt, keep only their plain name
+FINGERPRINTED = (".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".avif",
+                 ".woff", ".woff2", ".ttf", ".otf", ".mp4", ".webm", ".mp3", ".pdf")
+
+
+def fingerprinted_name(relative_path, digest):
+    root, extension = os.path.splitext(relative_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{extension}"
+
+
+def fingerprinted_url(url, assets):
+    # One dict lookup on the path part of a root-relative url, query and fragment are kept
+    if not assets:
+        return url
+    end = len(url)
+    for separator in "?#":
+        position = url.find(separator, 0, end)
+        if position != -1:
+            end = position
+    target = assets.get(url[:end])
+    return url if target is None else target + url[end:]
+
+
+def table_key(assets):
+    # Stable digest of a url table, "" when there is nothing to rewrite
+    if not assets:
+        return ""
+    return hashlib.sha256(json.dumps(sorted(assets.items())).encode()).hexdigest()
+
+
+def url_path(relative_path):
+    return "/" + relative_path.replace(os.sep, "/")
+
+
+def fingerprint_assets(static_root, output_root, manifest, enabled=True, link=False):
+    # Copies every fingerprintable static file to a name carrying its content hash, next to the
+    # plain copy the asset sync keeps, and writes asset-manifest.json mapping one to the other.
+    # Runs after sync_static and reuses its signatures, so an unchanged file is not even hashed.
+    # Returns the url lookup table: {"/index.css": "/index.3f9a1c2b7d.css"}
+    fingerprints = {}
+    for relative_path, signature in sorted(manifest.assets.items()):
+        if not enabled or not relative_path.lower().endswith(FINGERPRINTED):
+            continue
+        recorded = manifest.fingerprints.get(relative_path)
+        if (recorded is not None and recorded[:2] == signature
+                and os.path.exists(os.path.join(output_root, recorded[2]))):
+            fingerprints[relative_path] = recorded
+            continue
+        source = os.path.join(static_root, relative_path)
+        name = fingerprinted_name(relative_path, hash_file(source))
+        destination = os.path.join(output_root, name)
+        if not os.path.exists(destination):
+            copy_file(source, destination, link)
+        fingerprints[relative_path] = [signature[0], signature[1], name]
+
+    current = {name for _, _, name in fingerprints.values()}
+    for _, _, name in manifest.fingerprints.values():
+        destination = os.path.join(output_root, name)
+        if name not in current and os.path.exists(destination):
+            os.remove(destination)
+            prune_empty_dirs(os.path.dirname(destination), output_root)
+
+    asset_manifest_path = os.path.join(output_root, ASSET_MANIFEST_FILENAME)
+    if fingerprints:
+        if fingerprints != manifest.fingerprints or not os.path.exists(asset_manifest_path):
+            with atomic_open(asset_manifest_path) as file:
+                json.dump({relative_path.replace(os.sep, "/"): name.replace(os.sep, "/")
+                           for relative_path, (_, _, name) in sorted(fingerprints.items())},
+                          file, indent=1)
+    elif os.path.exists(asset_manifest_path):
+        os.remove(asset_manifest_path)
+
+    manifest.fingerprints = fingerprints
+    return {url_path(relative_path): url_path(name) for relative_path, (_, _, name) in fingerprints.items()}
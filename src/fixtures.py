@@ -0,0 +1,59 @@
+import io
+import os
+import tempfile
+import unittest
+from build_engine import build_pages, collect_pages
+from content_index import ContentIndex
+from manifest import BuildManifest
+
+TEMPLATE = "<html><title>{{ Title }}</title><body>{{ Content }}</body></html>"
+
+
+def render(template, **values):
+    # The whole page as one string, for comparing what template.write streams
+    output = io.StringIO()
+    template.write(output.write, **values)
+    return output.getvalue()
+
+
+class SiteTestCase(unittest.TestCase):
+    # Each test gets a fresh temporary directory as self.root, and write() to lay out files in it
+
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.root = self.tempdir.name
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def write(self, relative_path, contents):
+        path = os.path.join(self.root, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(contents)
+        return path
+
+
+class SiteBuildTestCase(SiteTestCase):
+    # A site under self.root: content, static and docs paths, template.html, an empty manifest and
+    # content index. Subclasses write their pages in setUp and pass their own options to build()
+    template_source = TEMPLATE
+
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.docs = os.path.join(self.root, "docs")
+        self.template = self.write("template.html", self.template_source)
+        self.manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        self.index = ContentIndex(os.path.join(self.root, "index.json"))
+
+    def read(self, *parts, mode="r"):
+        # A file in the output, by its path below docs
+        with open(os.path.join(self.docs, *parts), mode) as file:
+            return file.read()
+
+    def build(self, base_path="/", **options):
+        # Every page in content, with the manifest and index unless options say otherwise
+        options = {"manifest": self.manifest, "index": self.index, **options}
+        return build_pages(collect_pages(self.content, self.docs), self.template, base_path, **options)
@@ -0,0 +1,41 @@
+from itertools import chain
+
+FENCE = "---"
+
+
+def split_front_matter(lines):
+    # Returns (front matter, remaining lines, number of lines the front matter took up). Front
+    # matter is a block of "key: value" lines between two "---" lines at the very top; anything
+    # else leaves the lines untouched.
+    # Values in [brackets] become lists: tags: [elves, rings]
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, iter(()), 0
+    if first.strip() != FENCE:
+        return {}, chain([first], lines), 0
+
+    consumed = [first]
+    front_matter = {}
+    for line in lines:
+        consumed.append(line)
+        if line.strip() == FENCE:
+            return front_matter, lines, len(consumed)
+        key, separator, value = line.partition(":")
+        if not separator or not key.strip():
+            break
+        front_matter[key.strip()] = parse_value(value.strip())
+
+    return {}, chain(consumed, lines), 0
+
+
+def parse_value(value):
+    if value.startswith("[") and value.endswith("]"):
+        return [unquote(item.strip()) for item in value[1:-1].split(",") if item.strip()]
+    return unquote(value)
+
+
+def unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
@@ -0,0 +1,179 @@
+import profiling
+from block_markdown import markdown_lines_to_html_node
+from fingerprint import fingerprinted_url
+from images import add_image_props
+from fileutil import atomic_open
+from front_matter import split_front_matter
+from inline_markdown import title_from_line
+from profiling import stage
+
+URL_PROPS = ("href", "src")
+SUMMARY_LENGTH = 280
+
+
+def generate_page(from_path, template, dest_path, parse_cache=None, cache_key=None):
+    # Returns the page metadata so the build can index the page without reading it again
+    if parse_cache is not None:
+        cached = parse_cache.get(cache_key)
+        if cached is not None:
+            return write_cached_page(cached, template, dest_path)
+
+    if profiling.active_profiler is not None:
+        return generate_page_in_stages(from_path, template, dest_path, parse_cache, cache_key)
+
+    # The markdown is parsed straight off the file, picking up the title on the way through
+    with open(from_path, "r", encoding="utf-8") as markdown_file:
+        metadata, html_node = parse_page(markdown_file)
+    rewrite_props = url_rewriter(template)
+    # The body is only kept in memory for the cache, the file gets it in the same pass
+    content = [] if parse_cache is not None else None
+
+    def write_content(write):
+        if content is not None:
+            write = tee(write, content.append)
+        html_node.write_html(write, rewrite_props)
+
+    # The page is never built as one string: template chrome and the node tree stream into the file
+    with atomic_open(str(dest_path)) as dest_file:
+        template.write(dest_file.write, Title=metadata["title"], Content=write_content)
+    if content is not None:
+        parse_cache.put(cache_key, metadata, "".join(content))
+    return metadata
+
+def tee(*writes):
+    def write(part):
+        for each in writes:
+            each(part)
+    return write
+
+def parse_page(lines):
+    # (metadata, node tree). The metadata is everything the content index keeps about a page:
+    # its title, summary, word count, front matter and the (line, url) of each link and image.
+    # A front matter title beats the heading.
+    front_matter, lines, line_count = split_front_matter(lines)
+    titles = []
+    links = []
+    html_node = markdown_lines_to_html_node(scan_title(lines, titles), links, line_count + 1)
+    title = front_matter.get("title") or (titles[0] if titles else None)
+    if title is None:
+        raise Exception("Error: No Header found")
+    metadata = {
+        "title": title,
+        "summary": page_summary(html_node),
+        "words": sum(len(node_text(block).split()) for block in html_node.children),
+        "front_matter": front_matter,
+        "links": links,
+    }
+    return metadata, html_node
+
+def render_markdown(lines, template, parse_cache=None, cache_key=None):
+    # (metadata, page) with the whole page as a list of strings, for callers that do their own
+    # reading and writing
+    cached = parse_cache.get(cache_key) if parse_cache is not None else None
+    if cached is None:
+        metadata, html_node = parse_page(lines)
+        content = []
+        html_node.write_html(content.append, url_rewriter(template))
+        if parse_cache is not None:
+            parse_cache.put(cache_key, metadata, "".join(content))
+    else:
+        metadata, body = cached
+        content = [body]
+
+    page = []
+    template.write(page.append, Title=metadata["title"], Content=lambda write: page.extend(content))
+    return metadata, page
+
+def write_cached_page(cached, template, dest_path):
+    # Templating streams into the file, so both are timed as the write
+    metadata, body = cached
+    with stage("write"):
+        with atomic_open(str(dest_path)) as dest_file:
+            template.write(dest_file.write, Title=metadata["title"], Content=body)
+    return metadata
+
+def generate_page_in_stages(from_path, template, dest_path, parse_cache=None, cache_key=None):
+    # Profiling counterpart of generate_page: the same steps run one after another instead of
+    # streaming into each other, so reading, parsing, serializing and writing can be timed apart.
+    # Block splitting and typing happen in the same pass and are reported together.
+    with stage("file read"):
+        with open(from_path, "r", encoding="utf-8") as markdown_file:
+            lines = markdown_file.readlines()
+
+    with stage("block parsing"):
+        metadata, html_node = parse_page(lines)
+
+    with stage("html serialization"):
+        content = []
+        html_node.write_html(content.append, url_rewriter(template))
+        if parse_cache is not None:
+            parse_cache.put(cache_key, metadata, "".join(content))
+
+    with stage("templating"):
+        page = []
+        template.write(page.append, Title=metadata["title"], Content=lambda write: page.extend(content))
+
+    with stage("write"):
+        with atomic_open(str(dest_path)) as dest_file:
+            dest_file.writelines(page)
+    return metadata
+
+def page_summary(html_node, limit=SUMMARY_LENGTH):
+    # Text of the first paragraph with some prose in it, cut at a word boundary. Paragraphs that
+    # are only links and images (back links, banners) are passed over.
+    for child in html_node.children or ():
+        if child.tag != "p" or all(node.tag in ("a", "img") or not (node.value or "").strip()
+                                   for node in child.children):
+            continue
+        text = " ".join(node_text(child).split())
+        if not text:
+            continue
+        if len(text) > limit:
+            text = text[:limit].rsplit(" ", 1)[0] + "…"
+        return text
+    return ""
+
+def node_text(node):
+    # Leaf values below node, images contribute nothing
+    parts = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node.children is not None:
+            stack.extend(reversed(node.children))
+        elif node.tag != "img" and node.value:
+            parts.append(node.value)
+    return "".join(parts)
+
+def scan_title(lines, titles):
+    for line in lines:
+        if not titles:
+            title = title_from_line(line.rstrip("\n"))
+            if title is not None:
+                titles.append(title)
+        yield line
+
+def url_rewriter(template):
+    base_path, assets, images = template.base_path, template.assets, template.images
+    if base_path == "/" and not assets and not images:
+        return None
+
+    # Root-relative urls of link and image nodes are swapped for their fingerprinted asset and
+    # prefixed while serializing, so the content is never rescanned and shared (cached) nodes
+    # are never modified
+    def rewrite_props(tag, props):
+        rewritten = None
+        for prop in URL_PROPS:
+            value = props.get(prop)
+            if value is not None and value.startswith("/"):
+                if rewritten is None:
+                    rewritten = dict(props)
+                rewritten[prop] = base_path + fingerprinted_url(value, assets)[1:]
+        if images and tag == "img":
+            image = images.get(props.get("src"))
+            if image is not None:
+                rewritten = rewritten or props
+                rewritten = add_image_props(rewritten, rewritten["src"], image, base_path)
+        return props if rewritten is None else rewritten
+
+    return rewrite_props
@@ -1,6 +1,9 @@
+from types import MappingProxyType
 
 
 class HTMLNode:
+    # Slots instead of a per-instance __dict__: large sites create millions of nodes
+    __slots__ = ("tag", "value", "children", "props")
 
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
@@ -10,21 +13,30 @@ class HTMLNode:
 
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
+
+    def write_html(self, write, rewrite_props=None):
+        write(self.to_html())
     
     def props_to_html(self):
-        return_string = ""
-        if self.props is not None:
-            for key, value in self.props.items():
-                return_string += f' {key}="{value}"'
-
-        return return_string
+        return format_props(self.props)
     
     def __repr__(self):
         return f"HTMLNode Class (Tag: {self.tag}, Value: {self.value}, Children: {self.children}, Props: {self.props})"
     
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
+    # Leaf nodes are immutable so parsed inline children can be cached and shared between pages
     def __init__(self, tag, value, props=None):
-        super().__init__(tag, value, None, props)
+        if props is not None:
+            props = MappingProxyType(dict(props))
+        object.__setattr__(self, "tag", tag)
+        object.__setattr__(self, "value", value)
+        object.__setattr__(self, "children", None)
+        object.__setattr__(self, "props", props)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"LeafNode is immutable, cannot set {name}")
 
     def to_html(self):
         if self.value is None:
@@ -36,23 +48,66 @@ class LeafNode(HTMLNode):
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
     
     def __repr__(self):
-        return f"LeafNode({self.tag}, {self.value}, {self.props})"
+        props = None if self.props is None else dict(self.props)
+        return f"LeafNode({self.tag}, {self.value}, {props})"
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        parts = []
+        self.write_html(parts.append)
+        return "".join(parts)
+
+    def write_html(self, write, rewrite_props=None):
+        # Walks the tree with a stack of child iterators instead of recursing, so deep
+        # documents never hit the recursion limit and every fragment is written exactly once.
+        # rewrite_props(tag, props) may return replacement props for a node, e.g. to prefix urls,
+        # without touching the (possibly shared) nodes themselves.
         if self.tag is None:
             raise ValueError("Error: Tag is required")
         if self.children is None:
             raise ValueError("Error: Children are required")
-        
-        children_string = ""
-        for child in self.children:
-            children_string += child.to_html()
-
-        return f"<{self.tag}{self.props_to_html()}>{children_string}</{self.tag}>"
+        write(f"<{self.tag}{node_props_to_html(self, rewrite_props)}>")
+        stack = [(iter(self.children), f"</{self.tag}>")]
+        while stack:
+            children, closing_tag = stack[-1]
+            for node in children:
+                node_type = type(node)
+                if node_type is LeafNode and node.value is not None:
+                    if node.tag is None:
+                        write(node.value)
+                    elif node.props:
+                        write(f"<{node.tag}{node_props_to_html(node, rewrite_props)}>{node.value}</{node.tag}>")
+                    else:
+                        write(f"<{node.tag}>{node.value}</{node.tag}>")
+                elif isinstance(node, ParentNode):
+                    if node.tag is None:
+                        raise ValueError("Error: Tag is required")
+                    if node.children is None:
+                        raise ValueError("Error: Children are required")
+                    write(f"<{node.tag}{node_props_to_html(node, rewrite_props)}>")
+                    stack.append((iter(node.children), f"</{node.tag}>"))
+                    break
+                else:
+                    node.write_html(write, rewrite_props)
+            else:
+                stack.pop()
+                write(closing_tag)
     
     def __repr__(self):
-        return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
\ No newline at end of file
+        return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
+
+
+def format_props(props):
+    if props is None:
+        return ""
+    return "".join([f' {key}="{value}"' for key, value in props.items()])
+
+def node_props_to_html(node, rewrite_props):
+    if rewrite_props is None or not node.props:
+        return format_props(node.props)
+    return format_props(rewrite_props(node.tag, node.props))
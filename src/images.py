@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from assets import copy_file
+from fileutil import atomic_open
+from fingerprint import url_path
+from manifest import hash_file, prune_empty_dirs
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_WIDTHS = [480, 960, 1440]
+IMAGE_QUALITY = 82
+# Raster formats worth resizing; svg scales by itself and gif may be animated
+RESPONSIVE_SUFFIXES = (".png", ".jpg", ".jpeg", ".webp")
+METADATA_FILENAME = "image.json"
+# Bump when a change here changes the files generated for the same settings
+IMAGE_CACHE_VERSION = 1
+
+
+class ImageResult:
+
+    def __init__(self):
+        self.generated = []
+        self.cached = []
+        self.unchanged = []
+        self.removed = []
+        self.failed = []
+
+    def __repr__(self):
+        return (f"ImageResult(generated: {len(self.generated)}, cached: {len(self.cached)}, "
+                f"unchanged: {len(self.unchanged)}, removed: {len(self.removed)})")
+
+
+def settings_key(widths, webp, quality=IMAGE_QUALITY):
+    return f"{IMAGE_CACHE_VERSION}:{','.join(str(width) for width in sorted(widths))}:{int(webp)}:{quality}"
+
+
+def cache_key(digest, settings):
+    # Content addressed: the same bytes with the same settings always land in the same entry,
+    # whatever the file is called and whichever site uses it
+    return hashlib.sha256(f"{digest}\0{settings}".encode()).hexdigest()
+
+
+def variant_name(relative_path, key, width, extension):
+    root, _ = os.path.splitext(relative_path)
+    return f"{root}.{key[:10]}.{width}w{extension}"
+
+
+def render_variants(task):
+    # Runs in a worker: resizes one image into its cache entry and returns the entry's metadata,
+    # {"width", "height", "variants": [[width, height, extension], ...]}
+    source, directory, widths, webp, quality = task
+    os.makedirs(directory, exist_ok=True)
+    with Image.open(source) as image:
+        width, height = image.size
+        extension = os.path.splitext(source)[1].lower()
+        if image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+        targets = [target for target in sorted(widths) if target < width]
+
+        variants = []
+        for target in targets + ([width] if webp else []):
+            target_height = max(1, round(height * target / width))
+            resized = image if target == width else image.resize((target, target_height), Image.LANCZOS)
+            formats = [".webp"] if webp else [extension]
+            for variant_extension in formats:
+                save_variant(resized, os.path.join(directory, f"{target}w{variant_extension}"), variant_extension,
+                             quality)
+                variants.append([target, target_height, variant_extension])
+
+    metadata = {"width": width, "height": height, "variants": variants}
+    with atomic_open(os.path.join(directory, METADATA_FILENAME)) as file:
+        json.dump(metadata, file)
+    return metadata
+
+
+def save_variant(image, path, extension, quality):
+    with atomic_open(path, "wb") as file:
+        if extension in (".jpg", ".jpeg"):
+            image.convert("RGB").save(file, "JPEG", quality=quality, optimize=True, progressive=True)
+        elif extension == ".webp":
+            image.save(file, "WEBP", quality=quality, method=6)
+        else:
+            image.save(file, "PNG", optimize=True)
+
+
+def read_cache_entry(directory):
+    try:
+        with open(os.path.join(directory, METADATA_FILENAME), "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def image_props(relative_path, key, metadata, settings):
+    # What an img pointing at this image gains: its intrinsic size and, when there are variants,
+    # a srcset of them. Variant urls are root relative, the base path is added by the rewriter
+    props = {"width": metadata["width"], "height": metadata["height"], "srcset": [],
+             "sizes": f"(max-width: {metadata['width']}px) 100vw, {metadata['width']}px", "settings": settings}
+    for width, _, extension in metadata["variants"]:
+        url = url_path(variant_name(relative_path, key, width, extension))
+        props["srcset"].append([url, width])
+    # Without webp the original itself is the widest candidate, the rewriter adds it by its final src
+    props["original"] = not any(extension == ".webp" for _, _, extension in metadata["variants"])
+    return props
+
+
+def build_images(static_root, output_root, cache_directory, manifest, enabled=True, widths=IMAGE_WIDTHS,
+                 webp=False, jobs=1, link=False):
+    # Generates resized variants of every raster image in static/ and returns the props table for
+    # url_rewriter: {"/images/cat.png": {"width", "height", "srcset", "sizes", "original"}}.
+    # Variants live in cache_directory keyed by image content and settings, so an image is resized
+    # once however often it is built, and are copied into the output under content addressed names
+    result = ImageResult()
+    settings = settings_key(widths, webp)
+    images = {}
+    pending = {}
+    for relative_path, signature in sorted(manifest.assets.items()):
+        if not enabled or not relative_path.lower().endswith(RESPONSIVE_SUFFIXES):
+            continue
+        recorded = manifest.images.get(relative_path)
+        unchanged = recorded is not None and recorded[:2] == signature and recorded[3] == settings
+        # An unchanged file keeps its recorded key and is not even hashed
+        key = recorded[2] if unchanged else cache_key(hash_file(os.path.join(static_root, relative_path)), settings)
+        images[relative_path] = [signature[0], signature[1], key, settings]
+        directory = os.path.join(cache_directory, key[:2], key)
+        if read_cache_entry(directory) is None:
+            pending[relative_path] = directory
+        elif unchanged:
+            result.unchanged.append(relative_path)
+        else:
+            result.cached.append(relative_path)
+
+    tasks = {relative_path: (os.path.join(static_root, relative_path), directory, widths, webp, IMAGE_QUALITY)
+             for relative_path, directory in pending.items()}
+    if Image is None:
+        # Entries already in the cache still work, new images need Pillow to be resized
+        outcomes = {relative_path: ImportError("resizing images needs Pillow (pip install Pillow)")
+                    for relative_path in tasks}
+    elif jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {relative_path: executor.submit(render_variants, task) for relative_path, task in tasks.items()}
+            outcomes = {relative_path: future.exception() for relative_path, future in futures.items()}
+    else:
+        outcomes = {}
+        for relative_path, task in tasks.items():
+            try:
+                render_variants(task)
+                outcomes[relative_path] = None
+            except Exception as error:
+                outcomes[relative_path] = error
+    for relative_path, error in outcomes.items():
+        if error is None:
+            result.generated.append(relative_path)
+        else:
+            # Left out of the manifest so the next build tries again; the page keeps the plain image
+            result.failed.append((relative_path, error))
+            del images[relative_path]
+
+    table = {}
+    outputs = set()
+    for relative_path, (_, _, key, _) in images.items():
+        directory = os.path.join(cache_directory, key[:2], key)
+        metadata = read_cache_entry(directory)
+        if metadata is None:
+            continue
+        for width, _, extension in metadata["variants"]:
+            name = variant_name(relative_path, key, width, extension)
+            destination = os.path.join(output_root, name)
+            outputs.add(name)
+            if not os.path.exists(destination):
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                copy_file(os.path.join(directory, f"{width}w{extension}"), destination, link)
+        table[url_path(relative_path)] = image_props(relative_path, key, metadata, settings)
+
+    for relative_path, recorded in manifest.images.items():
+        directory = os.path.join(cache_directory, recorded[2][:2], recorded[2])
+        metadata = read_cache_entry(directory) or {"variants": []}
+        for width, _, extension in metadata["variants"]:
+            name = variant_name(relative_path, recorded[2], width, extension)
+            destination = os.path.join(output_root, name)
+            if name not in outputs and os.path.exists(destination):
+                os.remove(destination)
+                prune_empty_dirs(os.path.dirname(destination), output_root)
+                result.removed.append(name)
+
+    manifest.images = images
+    return table, result
+
+
+def add_image_props(props, src, image, base_path):
+    # props of an img node plus width, height, srcset and sizes; src is the final, rewritten url
+    rewritten = dict(props)
+    rewritten.setdefault("width", str(image["width"]))
+    rewritten.setdefault("height", str(image["height"]))
+    candidates = [f"{base_path}{url[1:]} {width}w" for url, width in image["srcset"]]
+    if candidates:
+        if image["original"]:
+            candidates.append(f"{src} {image['width']}w")
+        rewritten["srcset"] = ", ".join(candidates)
+        rewritten["sizes"] = image["sizes"]
+    return rewritten
@@ -1,22 +1,33 @@
 from textnode import *
 import re
 
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 def extract_title(markdown):
     lines = markdown.split("\n")
 
     for line in lines:
-        line = line.strip(" ")
-        if line.startswith("# "):
-            stripped_line = line.strip("# ")
-            return stripped_line
+        title = title_from_line(line)
+        if title is not None:
+            return title
     
     raise Exception("Error: No Header found")
 
+def title_from_line(line):
+    line = line.strip(" ")
+    if line.startswith("# "):
+        return line.strip("# ")
+    return None
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
 
     for node in old_nodes:
         #if node.texttype == TextType.TEXT:
+            if delimiter not in node.text:
+                new_nodes.append(node)
+                continue
             split_nodes = []
             sections = node.text.split(delimiter)
             for i in range(len(sections)):
@@ -32,13 +43,14 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return new_nodes
 
 def extract_markdown_images(text):
-    regex = r"!\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    result = re.findall(regex, text)
-    return result
+    if "](" not in text:
+        return []
+    return IMAGE_PATTERN.findall(text)
 
 def extract_markdown_links(text):
-    regex = r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)"
-    return re.findall(regex, text)
+    if "](" not in text:
+        return []
+    return LINK_PATTERN.findall(text)
 
 def split_nodes_image_TEMP(old_nodes):
     new_nodes = []
@@ -127,14 +139,83 @@ def split_nodes_link(old_nodes):
 
     return new_nodes
 
-def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+TEXT = TextType.TEXT
+BOLD = TextType.BOLD
+ITALIC = TextType.ITALIC
+CODE = TextType.CODE
+LINK = TextType.LINK
+IMAGE = TextType.IMAGE
 
-    return nodes
+# Delimiters, or an image/link that does not contain a delimiter (the chained splits would cut it first)
+INLINE_TOKENS = re.compile(
+    r"(\*\*|_|`)"
+    r"|(!?)\[((?:[^\[\]_`*]|\*(?!\*))*)\]\(((?:[^\(\)_`*]|\*(?!\*))*)\)"
+)
 
+def text_to_textnodes(text):
+    # Most fragments are plain prose: without a delimiter or a "](" there is nothing to lex
+    if "_" not in text and "`" not in text and "**" not in text and "](" not in text:
+        return [TextNode(text, TEXT)]
+    return lex_inline(text)
+
+def lex_inline(text):
+    # Single pass equivalent of chaining split_nodes_delimiter for "**", "_" and "`" and then
+    # split_nodes_image and split_nodes_link. Each "**" toggles bold and restarts the italic and
+    # code runs, each "_" toggles italic and restarts the code run, and each "`" toggles code,
+    # which is exactly how the chained splits nest. Images and links only count in plain text runs.
+    # re.split hands back [text, delimiter, bang, label, url, text, ...] without building match objects.
+    pieces = INLINE_TOKENS.split(text)
+    nodes = []
+    append = nodes.append
+    bold = italic = code = False
+    run = ""
+    run_has_links = False
+    for index in range(0, len(pieces) - 1, 5):
+        run += pieces[index]
+        delimiter = pieces[index + 1]
+        if delimiter is None:
+            if bold or italic or code:
+                run += f"{pieces[index + 2]}[{pieces[index + 3]}]({pieces[index + 4]})"
+                continue
+            if run:
+                append(TextNode(run, TEXT))
+            if pieces[index + 2]:
+                append(TextNode(pieces[index + 3], IMAGE, pieces[index + 4]))
+            else:
+                append(TextNode(pieces[index + 3], LINK, pieces[index + 4]))
+            run = ""
+            run_has_links = True
+            continue
 
+        if code:
+            append(TextNode(run, CODE))
+        elif italic:
+            append(TextNode(run, ITALIC))
+        elif bold:
+            append(TextNode(run, BOLD))
+        elif run or not run_has_links:
+            # split_nodes_image/link drop empty text around links but keep a lone empty run
+            append(TextNode(run, TEXT))
+
+        if delimiter == "**":
+            bold = not bold
+            italic = code = False
+        elif delimiter == "_":
+            italic = not italic
+            code = False
+        else:
+            code = not code
+        run = ""
+        run_has_links = False
+
+    run += pieces[-1]
+    if code:
+        append(TextNode(run, CODE))
+    elif italic:
+        append(TextNode(run, ITALIC))
+    elif bold:
+        append(TextNode(run, BOLD))
+    elif run or not run_has_links:
+        append(TextNode(run, TEXT))
+
+    return nodes
@@ -0,0 +1,86 @@
+import os
+import posixpath
+from urllib.parse import unquote
+
+EXTERNAL_PREFIXES = ("//", "#", "mailto:", "tel:", "data:", "javascript:")
+
+
+class BrokenLink:
+
+    def __init__(self, source, line, url):
+        self.source = source
+        self.line = line
+        self.url = url
+
+    def __eq__(self, other):
+        return (self.source, self.line, self.url) == (other.source, other.line, other.url)
+
+    def __repr__(self):
+        return f"BrokenLink({self.source}, {self.line}, {self.url})"
+
+    def __str__(self):
+        return f"{self.source}:{self.line}: broken link {self.url}"
+
+
+class PathIndex:
+    # Every url path the built site can answer, computed once so checking a link is a set lookup.
+    # A page at blog/post/index.html answers blog/post/index.html, blog/post/ and blog/post.
+
+    def __init__(self):
+        self.paths = {""}
+
+    def add_page(self, relative_output):
+        path = relative_output.replace(os.sep, "/")
+        self.paths.add(path)
+        directory, name = posixpath.split(path)
+        if name == "index.html":
+            self.paths.add(directory)
+        elif name.endswith(".html"):
+            self.paths.add(path[:-len(".html")])
+
+    def add_file(self, relative_path):
+        self.paths.add(relative_path.replace(os.sep, "/"))
+
+    def __contains__(self, path):
+        return path.rstrip("/") in self.paths or path in self.paths
+
+    def __len__(self):
+        return len(self.paths)
+
+
+def resolve_link(url, page_path):
+    # Site path a url points at, relative to the output root, or None for urls outside the site
+    if url.startswith(EXTERNAL_PREFIXES) or "://" in url:
+        return None
+    path = unquote(url.split("#", 1)[0].split("?", 1)[0])
+    if not path:
+        return None
+    if not path.startswith("/"):
+        path = posixpath.join("/", posixpath.dirname(page_path), path)
+    path = posixpath.normpath(path)
+    return "" if path == "/" else path.lstrip("/")
+
+
+def build_path_index(content_index, assets, output_root, generated=()):
+    paths = PathIndex()
+    for entry in content_index:
+        paths.add_page(os.path.relpath(entry.output, output_root))
+    for output in generated:
+        paths.add_page(os.path.relpath(output, output_root))
+    for asset in assets:
+        paths.add_file(asset)
+    return paths
+
+
+def check_links(content_index, assets, output_root, generated=()):
+    # Links come from the content index, so unchanged pages are checked without reading them again.
+    # Generated pages, like listings, can be linked to but their own links are not checked
+    paths = build_path_index(content_index, assets, output_root, generated)
+    broken = []
+    for entry in content_index:
+        page_path = os.path.relpath(entry.output, output_root).replace(os.sep, "/")
+        for line, url in entry.links:
+            path = resolve_link(url, page_path)
+            if path is not None and path not in paths:
+                broken.append(BrokenLink(entry.source, line, url))
+    return broken
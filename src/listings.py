@@ -0,0 +1,195 @@
+import hashlib
+import os
+import re
+from html import escape
+from feeds import page_url
+from fileutil import atomic_open
+from manifest import prune_empty_dirs
+from template import Template
+
+LISTING_PAGE_SIZE = 10
+SLUG_PATTERN = re.compile(r"[^a-z0-9]+")
+
+
+class ListingResult:
+
+    def __init__(self):
+        self.written = []
+        self.unchanged = []
+        self.removed = []
+
+    def __repr__(self):
+        return (f"ListingResult(written: {len(self.written)}, unchanged: {len(self.unchanged)}, "
+                f"removed: {len(self.removed)})")
+
+
+def slugify(text):
+    return SLUG_PATTERN.sub("-", text.lower()).strip("-") or "-"
+
+
+def section_title(section):
+    return os.path.basename(section.rstrip(os.sep)).replace("-", " ").replace("_", " ").title()
+
+
+def listing_path(directory, number, first_at_root=True):
+    # blog/index.html, blog/page/2/index.html, ... When a content page already owns
+    # blog/index.html the first page moves to blog/page/1/index.html instead
+    if number == 1 and first_at_root:
+        return os.path.join(directory, "index.html")
+    return os.path.join(directory, "page", str(number), "index.html")
+
+
+class ListingBuilder:
+    # Turns content index entries into (relative output, title, body html) listing pages.
+    # Nothing here touches the markdown: titles, summaries, dates and tags all come from the index
+
+    def __init__(self, output_root, base_path="/", page_size=LISTING_PAGE_SIZE, owned=()):
+        self.output_root = output_root
+        self.base_path = base_path
+        self.page_size = page_size
+        self.owned = set(owned)
+
+    def url(self, relative_output):
+        return page_url(os.path.join(self.output_root, relative_output), self.output_root, self.base_path)
+
+    def first_at_root(self, directory):
+        return os.path.join(self.output_root, directory, "index.html") not in self.owned
+
+    def section(self, entries, section):
+        # Listing, tag and archive pages for one section, newest first
+        if not entries:
+            return []
+        entries = sorted(entries, key=lambda entry: (entry.date, entry.title), reverse=True)
+        name = section_title(section)
+        tags_directory = os.path.join(section, "tags")
+        pages = self.paginated(entries, section, name, tags_directory)
+
+        # Tags that slugify alike, like "C" and "C++", share one listing instead of one hiding the
+        # other: {slug: ([tag, ...], entries)}
+        tags = {}
+        for entry in entries:
+            for tag in entry.tags:
+                names, tagged = tags.setdefault(slugify(tag), ([], []))
+                if tag not in names:
+                    names.append(tag)
+                if not tagged or tagged[-1] is not entry:
+                    tagged.append(entry)
+        for slug, (names, tagged) in sorted(tags.items()):
+            pages.extend(self.paginated(tagged, os.path.join(tags_directory, slug),
+                                        f"{name}: {', '.join(sorted(names))}", tags_directory))
+        if tags:
+            pages.append((os.path.join(tags_directory, "index.html"), f"{name} tags",
+                          self.tags_body(f"{name} tags", tags, tags_directory)))
+
+        pages.append((os.path.join(section, "archive", "index.html"), f"{name} archive",
+                      self.archive_body(f"{name} archive", entries, tags_directory)))
+        return pages
+
+    def paginated(self, entries, directory, title, tags_directory):
+        first_at_root = self.first_at_root(directory)
+        slices = [entries[start:start + self.page_size] for start in range(0, len(entries), self.page_size)]
+        paths = [listing_path(directory, number, first_at_root) for number in range(1, len(slices) + 1)]
+        pages = []
+        for number, (path, entries_slice) in enumerate(zip(paths, slices), 1):
+            page_title = title if number == 1 else f"{title}, page {number}"
+            previous = self.url(paths[number - 2]) if number > 1 else None
+            following = self.url(paths[number]) if number < len(paths) else None
+            pages.append((path, page_title, self.listing_body(page_title, entries_slice, number, len(paths),
+                                                              previous, following, tags_directory)))
+        return pages
+
+    def entry_url(self, entry):
+        return page_url(entry.output, self.output_root, self.base_path)
+
+    def tag_url(self, tags_directory, tag):
+        directory = os.path.join(tags_directory, slugify(tag))
+        return self.url(listing_path(directory, 1, self.first_at_root(directory)))
+
+    def tag_links(self, entry, tags_directory):
+        return "".join(f' <a href="{escape(self.tag_url(tags_directory, tag))}" rel="tag">{escape(tag)}</a>'
+                       for tag in entry.tags)
+
+    def listing_body(self, title, entries, number, count, previous, following, tags_directory):
+        parts = [f"<div><h1>{escape(title)}</h1><ul class=\"listing\">"]
+        for entry in entries:
+            parts.append(f'<li><a href="{escape(self.entry_url(entry))}">{escape(entry.title)}</a> '
+                         f'<time datetime="{escape(entry.date)}">{escape(entry.date)}</time>')
+            parts.append(self.tag_links(entry, tags_directory))
+            if entry.summary:
+                parts.append(f"<p>{escape(entry.summary)}</p>")
+            parts.append("</li>")
+        parts.append("</ul>")
+        if count > 1:
+            parts.append('<nav class="pagination">')
+            if previous is not None:
+                parts.append(f'<a href="{escape(previous)}" rel="prev">Newer</a> ')
+            parts.append(f"<span>Page {number} of {count}</span>")
+            if following is not None:
+                parts.append(f' <a href="{escape(following)}" rel="next">Older</a>')
+            parts.append("</nav>")
+        parts.append("</div>")
+        return "".join(parts)
+
+    def tags_body(self, title, tags, tags_directory):
+        parts = [f"<div><h1>{escape(title)}</h1><ul class=\"tags\">"]
+        for _, (names, tagged) in sorted(tags.items()):
+            url = self.tag_url(tags_directory, names[0])
+            label = ", ".join(sorted(names))
+            parts.append(f'<li><a href="{escape(url)}" rel="tag">{escape(label)}</a> ({len(tagged)})</li>')
+        parts.append("</ul></div>")
+        return "".join(parts)
+
+    def archive_body(self, title, entries, tags_directory):
+        parts = [f"<div><h1>{escape(title)}</h1>"]
+        year = None
+        for entry in entries:
+            if entry.date[:4] != year:
+                if year is not None:
+                    parts.append("</ul>")
+                year = entry.date[:4]
+                parts.append(f'<h2>{escape(year)}</h2><ul class="archive">')
+            parts.append(f'<li><time datetime="{escape(entry.date)}">{escape(entry.date)}</time> '
+                         f'<a href="{escape(self.entry_url(entry))}">{escape(entry.title)}</a>'
+                         f"{self.tag_links(entry, tags_directory)}</li>")
+        if year is not None:
+            parts.append("</ul>")
+        parts.append("</div>")
+        return "".join(parts)
+
+
+def build_listings(index, manifest, template_path, content_root, output_root, base_path="/",
+                   sections=("blog",), page_size=LISTING_PAGE_SIZE, assets=None, minify=False):
+    # Every listing page is rendered from the index, which is cheap, but only written when its
+    # html differs from what the manifest says is on disk, so adding one post rewrites the
+    # pages its slice moved through rather than every page of every listing
+    # pages its slice moved through rather than every page of every listing. The digest covers
+    # minify too, since the postprocess stage minifies the written file in place
+    template = Template.load(template_path, base_path, assets)
+    builder = ListingBuilder(output_root, base_path, page_size, (entry.output for entry in index))
+    result = ListingResult()
+    listings = {}
+    for section in sections:
+        entries = index.in_directory(os.path.join(content_root, section))
+        for relative_output, title, body in builder.section(entries, section):
+            output = os.path.join(output_root, relative_output)
+            if output in builder.owned or output in listings:
+                continue
+            page = []
+            template.write(page.append, Title=escape(title), Content=body)
+            page = "".join(page)
+            digest = hashlib.sha256((("minify\0" if minify else "") + page).encode("utf-8")).hexdigest()
+            listings[output] = digest
+            if manifest.listings.get(output) == digest and os.path.exists(output):
+                result.unchanged.append(output)
+                continue
+            with atomic_open(output) as file:
+                file.write(page)
+            result.written.append(output)
+
+    for output in sorted(set(manifest.listings) - set(listings)):
+        if os.path.exists(output):
+            os.remove(output)
+            prune_empty_dirs(os.path.dirname(output), output_root)
+        result.removed.append(output)
+    manifest.listings = listings
+    return result
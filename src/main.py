@@ -1,112 +1,275 @@
+import argparse
+import cProfile
 import os
 import shutil
-import sys
-from pathlib import Path
-from block_markdown import markdown_to_html_node
-from inline_markdown import extract_title
+import profiling
+from assets import sync_static
+from block_markdown import INLINE_CACHE_SIZE
+from build_engine import build_pages, collect_pages, summarize
+from config import CONFIG_FILENAME, OUTPUT_MODES, ConfigError, build_config
+from feeds import SiteFeeds
+from fingerprint import fingerprint_assets
+from images import build_images
+from content_index import ContentIndex
+from linkcheck import check_links
+from listings import build_listings
+from manifest import BuildManifest
+from postprocess import postprocess
+from parse_cache import PARSE_CACHE_SIZE, ParseCache
+from profiling import BuildProfiler, stage
+from watch import DevBuilder, serve_and_watch
 
-DOCS_DIRECTORY = "/home/brain/workspace/github.com/Static-Site-Generator/docs"
-STATIC_DIRECTORY = "/home/brain/workspace/github.com/Static-Site-Generator/static"
-CONTENT_DIRECTORY = "/home/brain/workspace/github.com/Static-Site-Generator/content"
-TEMPLATE_PATH = "/home/brain/workspace/github.com/Static-Site-Generator/template.html"
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site")
+    parser.add_argument("base_path", nargs="?", default=None,
+                        help="path the site is served under, default /")
+    parser.add_argument("--config", "-c", metavar="PATH",
+                        help=f"JSON file with build settings, default ./{CONFIG_FILENAME} when present")
+    parser.add_argument("--content", metavar="DIR", help="markdown source directory, default content")
+    parser.add_argument("--static", metavar="DIR", help="static asset directory, default static")
+    parser.add_argument("--output", "-o", metavar="DIR", help="output directory, default docs")
+    parser.add_argument("--template", metavar="PATH", help="page template, default template.html")
+    parser.add_argument("--cache-dir", metavar="DIR", help="directory for the build manifest, default .cache")
+    parser.add_argument("--site-url", metavar="URL",
+                        help="absolute url of the site root, needed for sitemap.xml and feed.xml")
+    parser.add_argument("--output-mode", choices=OUTPUT_MODES,
+                        help="incremental keeps the output and skips unchanged pages, clean rebuilds it from scratch")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="number of worker processes, 1 renders serially, default one per CPU")
+    parser.add_argument("--pipeline", action="store_true", default=None,
+                        help="with --jobs 1, read sources and write pages on background threads while rendering")
+    parser.add_argument("--full", action="store_true",
+                        help="shorthand for --output-mode clean")
+    parser.add_argument("--inline-cache-size", type=int, default=INLINE_CACHE_SIZE,
+                        help="entries in the per-process inline parsing cache, 0 disables it")
+    parser.add_argument("--parse-cache-size", type=int, default=PARSE_CACHE_SIZE // (1024 * 1024), metavar="MB",
+                        help="size limit of the on-disk cache of rendered page bodies, 0 disables it")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="empty the on-disk parse cache before building")
+    parser.add_argument("--explain", action="store_true",
+                        help="print why each rebuilt page was considered stale")
+    parser.add_argument("--links", choices=("error", "warn", "off"), default="error",
+                        help="what a broken internal link or missing asset does to the build, default error")
+    parser.add_argument("--hash-assets", action="store_true",
+                        help="compare static files by content hash when size matches but mtime differs")
+    parser.add_argument("--link-assets", action="store_true",
+                        help="hardlink static files into the output instead of copying them")
+    parser.add_argument("--minify", action="store_true", default=None,
+                        help="minify the generated html and the css copied from static")
+    parser.add_argument("--compress", action="store_true", default=None,
+                        help="write precompressed .gz siblings, and .br when the brotli module is installed")
+    parser.add_argument("--fingerprint", action="store_true", default=None,
+                        help="also copy static files under content hashed names and point every reference at them")
+    parser.add_argument("--responsive-images", action="store_true", default=None,
+                        help="resize static images to image_widths and give img tags srcset, width and height")
+    parser.add_argument("--webp", action="store_true", default=None,
+                        help="make the resized images WebP")
+    parser.add_argument("--watch", action="store_true",
+                        help="serve the output with live reload and rebuild pages as files change")
+    parser.add_argument("--port", type=int, default=8888,
+                        help="port for the --watch development server")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every build stage per page and print a report")
+    parser.add_argument("--profile-pstats", metavar="PATH",
+                        help="also dump a cProfile of the main process to PATH (use with --jobs 1)")
+    parser.add_argument("--profile-trace", metavar="PATH",
+                        help="also write the stage timings as Chrome trace JSON to PATH")
+    return parser.parse_args(argv)
 
-def main():
-    Base_path = "/"
+def load_config(args):
+    try:
+        return build_config(args.config,
+                            content=args.content,
+                            static=args.static,
+                            output=args.output,
+                            template=args.template,
+                            base_path=args.base_path,
+                            jobs=args.jobs,
+                            pipeline=args.pipeline,
+                            cache_dir=args.cache_dir,
+                            output_mode="clean" if args.full else args.output_mode,
+                            site_url=args.site_url,
+                            minify=args.minify,
+                            compress=args.compress,
+                            fingerprint=args.fingerprint,
+                            responsive_images=args.responsive_images,
+                            image_webp=args.webp)
+    except (ConfigError, OSError) as error:
+        raise SystemExit(f"Error: {error}")
 
-    if len(sys.argv) > 0:
-        Base_path = sys.argv[0]
+def main(argv=None):
+    args = parse_args(argv)
+    config = load_config(args)
+    if args.profile_pstats or args.profile_trace:
+        args.profile = True
+    if not args.profile:
+        return build_site(args, config)
 
-    CopySourceFiles(STATIC_DIRECTORY, DOCS_DIRECTORY, True)
+    profiler = profiling.install_profiler(BuildProfiler(trace=args.profile_trace is not None))
+    cprofile = cProfile.Profile() if args.profile_pstats else None
+    try:
+        if cprofile is not None:
+            cprofile.enable()
+        build_site(args, config)
+    finally:
+        if cprofile is not None:
+            cprofile.disable()
+            cprofile.dump_stats(args.profile_pstats)
+        print (profiler.report())
+        if args.profile_trace:
+            profiler.write_chrome_trace(args.profile_trace)
+        profiling.install_profiler(None)
 
-    if check_paths():
-        recursive_generate_page(CONTENT_DIRECTORY,
-                        TEMPLATE_PATH,
-                        DOCS_DIRECTORY,
-                        Base_path)
+def build_site(args, config):
+    incremental = config.output_mode == "incremental"
+
+    # Incremental builds keep the output and rely on the manifest to drop stale pages and assets
+    index_path = os.path.join(config.cache_dir, "index.json")
+    if incremental:
+        manifest = BuildManifest.load(config.manifest_path)
+        index = ContentIndex.load(index_path)
     else:
-        raise Exception("Something went wrong, a path is missing")
+        manifest = BuildManifest(config.manifest_path)
+        index = ContentIndex(index_path)
+        if os.path.exists(config.output):
+            shutil.rmtree(config.output)
+    os.makedirs(config.cache_dir, exist_ok=True)
 
-def CopySourceFiles(src, dst, cleardir=False):
-    if not os.path.exists(src):
-        raise ValueError(f"Error: {src} file location does not exist")
-    
-    if cleardir:
-        if os.path.exists(dst):
-            shutil.rmtree(dst)
-        os.mkdir(dst)
-        pass
-
-    file_list = os.listdir(src)
-    for file in file_list:
-        full_path = os.path.join(src,file)
-        if os.path.isfile(full_path):
-            shutil.copy(full_path, dst)
-        elif os.path.isdir(full_path):
-            dirpath = os.path.join(dst, file)
-            os.mkdir(dirpath)
-            CopySourceFiles(os.path.join(src, file), dirpath)
-        else:
-            raise Exception(f"Error: Something went wrong with file at path {file}")
+    parse_cache_directory = os.path.join(config.cache_dir, "parse")
+    if args.clear_cache:
+        ParseCache(parse_cache_directory).clear()
+    parse_cache = None
+    if args.parse_cache_size > 0:
+        parse_cache = ParseCache(parse_cache_directory, args.parse_cache_size * 1024 * 1024)
+
+    with stage("asset copy"):
+        synced = sync_static(config.static, config.output, manifest,
+                             use_hash=args.hash_assets, link=args.link_assets)
+    print (f" Static files: {len(synced.copied)} copied, {len(synced.skipped)} unchanged, {len(synced.removed)} removed")
 
-def recursive_generate_page(content_directory, template_path, destination_directory, base_path):
-    file_list = os.listdir(content_directory)
+    # Also runs once after fingerprinting is turned off, to drop the hashed copies
+    assets = {}
+    if config.fingerprint or manifest.fingerprints:
+        with stage("asset copy"):
+            assets = fingerprint_assets(config.static, config.output, manifest, config.fingerprint, args.link_assets)
+        if assets:
+            print (f" Fingerprinted assets: {len(assets)}")
 
-    for file in file_list:
-        full_path = os.path.join(content_directory, file)
-        dest_path = os.path.join(destination_directory, file)
-        if os.path.isfile(full_path):
-            dest_path = Path(dest_path).with_suffix(".html")
-            generate_page(full_path, template_path, dest_path, base_path)
-        elif os.path.isdir(full_path):
-            recursive_generate_page(full_path, template_path, dest_path, base_path)
+    # Variants are cached by image content in cache_dir, so even clean builds only resize new images
+    image_options = {"cache_directory": os.path.join(config.cache_dir, "images"), "widths": config.image_widths,
+                     "webp": config.image_webp, "jobs": config.jobs, "link": args.link_assets}
+    images = {}
+    if config.responsive_images or manifest.images:
+        with stage("images"):
+            images, resized = build_images(config.static, config.output, manifest=manifest,
+                                           enabled=config.responsive_images, **image_options)
+        print (f" Images: {len(resized.generated)} resized, {len(resized.cached)} from cache, "
+               f"{len(resized.unchanged)} unchanged, {len(resized.removed)} variants removed")
+        for relative_path, error in resized.failed:
+            print (f" Could not resize {relative_path}: {error}")
 
-def generate_page(from_path, template_path, dest_path, base_path):
-    print (f" Generating page from {from_path} to {dest_path} using {template_path}")
+    if check_paths(config):
+        pages = collect_pages(config.content, config.output)
+        feeds = SiteFeeds(config.output, config.content, config.base_path,
+                          config.site_url, config.site_title, config.feed_section)
+        with feeds.open(pages):
+            results = build_pages(pages,
+                            config.template,
+                            config.base_path,
+                            config.jobs,
+                            manifest,
+                            inline_cache_size=args.inline_cache_size,
+                            parse_cache=parse_cache,
+                            on_result=feeds.add,
+                            index=index,
+                            assets=assets,
+                            images=images,
+                            pipeline=config.pipeline,
+                            minify=config.minify)
+            # Listings come from the index the pages just updated, and go in the sitemap with them
+            index.retain(source for source, _ in pages)
+            listings = build_listings(index, manifest, config.template, config.content, config.output,
+                                      config.base_path, config.listing_sections, page_size=config.listing_page_size,
+                                      assets=assets, minify=config.minify)
+            for output in sorted(manifest.listings):
+                feeds.add_listing(output)
+    else:
+        raise Exception("Something went wrong, a path is missing")
+
+    failed = []
+    for result in results:
+        if result.skipped:
+            continue
+        if args.explain:
+            print (f" Rebuilding {result.source}: {'; '.join(result.reasons)}")
+        if result.ok:
+            print (f" Generating page from {result.source} to {result.output} using {config.template}")
+        else:
+            failed.append(result)
 
-    markdown_file = open(from_path, "r")
-    markdown_contents = markdown_file.read()
-    markdown_file.close()
+    for output in listings.written:
+        print (f" Generating listing {output}")
 
-    template_file = open(template_path, "r")
-    template_contents = template_file.read()
-    template_file.close()
+    for output in manifest.remove_stale(config.output) + listings.removed:
+        print (f" Removed stale page {output}")
 
-    html_node = markdown_to_html_node(markdown_contents)
-    html_content = html_node.to_html()
-    title = extract_title(markdown_contents)
+    # Also runs once after both are turned off, to drop siblings that would now be out of date
+    if config.minify or config.compress or manifest.processed:
+        with stage("postprocess"):
+            processed = postprocess(config.output, manifest, config.minify, config.compress, config.jobs)
+        print (f" Postprocess: {len(processed.processed)} processed, {len(processed.skipped)} unchanged, "
+               f"{processed.bytes_before - processed.bytes_after} bytes saved by minifying")
+    manifest.save()
+    index.save()
 
-    template_contents = template_contents.replace("{{ Title }}", title)
-    template_contents = template_contents.replace("{{ Content }}", html_content)
+    broken = []
+    if args.links != "off":
+        with stage("link check"):
+            broken = check_links(index, manifest.assets, config.output, manifest.listings)
+        for link in broken:
+            print (f" {link}")
 
-    template_contents = template_contents.replace('href="/', f'href="{base_path}')
-    template_contents = template_contents.replace('src="/', f'src="{base_path}')
+    summary = summarize(results)
+    print (f" Built {summary['built']} pages, skipped {summary['skipped']} unchanged, {summary['failed']} failed")
+    print (f" Listings: {len(listings.written)} written, {len(listings.unchanged)} unchanged")
+    print (f" Inline cache: {summary['cache_hits']} hits, {summary['cache_misses']} misses")
+    if parse_cache is not None:
+        print (f" Parse cache: {summary['parse_cache_hits']} hits, {summary['parse_cache_misses']} misses")
 
-    dest_dirs = os.path.dirname(dest_path)
-    if dest_dirs != "":
-        os.makedirs(dest_dirs, exist_ok=True)
+    for result in failed:
+        print (f" Failed to generate page from {result.source}:\n{result.error}")
 
-    dest_file = open(dest_path, "w")
-    dest_file.write(template_contents)
+    if args.watch:
+        builder = DevBuilder(config, manifest, index=index, assets=assets, images=images,
+                             image_options=image_options if config.responsive_images else None,
+                             link_assets=args.link_assets, inline_cache_size=args.inline_cache_size,
+                             parse_cache=parse_cache)
+        serve_and_watch(builder, args.port)
+    elif failed:
+        raise Exception(f"Error: {len(failed)} page(s) failed to build")
+    elif broken and args.links == "error":
+        raise Exception(f"Error: {len(broken)} broken link(s)")
 
-def check_paths():
+def check_paths(config):
     all_clear = True
-    if not os.path.exists(CONTENT_DIRECTORY):
+    if not os.path.exists(config.content):
         print ("Content Path does not exist")
         all_clear = False
-    if not os.path.exists(os.path.join(CONTENT_DIRECTORY, "index.md")):
+    if not os.path.exists(os.path.join(config.content, "index.md")):
         print ("index.md does not exist")
         all_clear = False
-    if not os.path.exists(DOCS_DIRECTORY):
+    if not os.path.exists(config.output):
         print ("Public Path does not exist")
         all_clear = False
-    if not os.path.exists(TEMPLATE_PATH):
+    if not os.path.exists(config.template):
         print ("Template does not exist")
         all_clear = False
-    if not os.path.exists(STATIC_DIRECTORY):
+    if not os.path.exists(config.static):
         print ("Static path does not exist")
         all_clear = False
 
     return all_clear
 
-main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+from fileutil import atomic_open
+
+MANIFEST_VERSION = 9
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+
+    def __init__(self, path):
+        self.path = path
+        self.pages = {}
+        self.assets = {}
+        # Generated listing pages by output path, with the hash of the html last written there
+        self.listings = {}
+        # Output files the postprocess stage minified or compressed, see postprocess.signature
+        self.processed = {}
+        # Static files copied under a content hashed name: [size, mtime_ns, fingerprinted path]
+        self.fingerprints = {}
+        # Static images with resized variants: [size, mtime_ns, image cache key, settings]
+        self.images = {}
+        self.seen = set()
+
+    @classmethod
+    def load(cls, path):
+        manifest = cls(path)
+        if not os.path.exists(path):
+            return manifest
+
+        with open(path, "r") as file:
+            try:
+                data = json.load(file)
+            except json.JSONDecodeError:
+                return manifest
+
+        # An unknown layout is treated as an empty manifest, forcing a full rebuild
+        if data.get("version") == MANIFEST_VERSION:
+            manifest.pages = data.get("pages", {})
+            manifest.assets = data.get("assets", {})
+            manifest.listings = data.get("listings", {})
+            manifest.processed = data.get("processed", {})
+            manifest.fingerprints = data.get("fingerprints", {})
+            manifest.images = data.get("images", {})
+        return manifest
+
+    def stale_reasons(self, source, source_hash, template_hash, output, base_path):
+        # Every recorded dependency that no longer matches, an empty list means the page is fresh
+        self.seen.add(source)
+        entry = self.pages.get(source)
+        if entry is None:
+            return ["new page"]
+
+        reasons = []
+        if entry["source_hash"] != source_hash:
+            reasons.append("source changed")
+        if entry["template_hash"] != template_hash:
+            reasons.append("template changed")
+        if entry["base_path"] != base_path:
+            reasons.append("base path changed")
+        if entry["output"] != str(output):
+            reasons.append("output path changed")
+        elif not os.path.exists(output):
+            reasons.append("output missing")
+        for asset, signature in sorted(entry.get("assets", {}).items()):
+            current = self.assets.get(asset)
+            if current is None:
+                reasons.append(f"asset {asset} removed")
+            elif current != signature:
+                reasons.append(f"asset {asset} changed")
+        return reasons
+
+    def record(self, source, source_hash, template_hash, output, base_path, assets=None):
+        self.seen.add(source)
+        self.pages[source] = {
+            "source_hash": source_hash,
+            "template_hash": template_hash,
+            "output": str(output),
+            "base_path": base_path,
+            "assets": dict(assets or {}),
+        }
+
+    def remove_stale(self, output_root):
+        return self.remove_pages([source for source in self.pages if source not in self.seen], output_root)
+
+    def remove_pages(self, sources, output_root):
+        removed = []
+        for source in sources:
+            if source not in self.pages:
+                continue
+            output = self.pages.pop(source)["output"]
+            if os.path.exists(output):
+                os.remove(output)
+                prune_empty_dirs(os.path.dirname(output), output_root)
+            removed.append(output)
+
+        return removed
+
+    def save(self):
+        with atomic_open(self.path) as file:
+            json.dump({"version": MANIFEST_VERSION, "pages": self.pages, "assets": self.assets,
+                       "listings": self.listings, "processed": self.processed,
+                       "fingerprints": self.fingerprints, "images": self.images}, file, indent=1, sort_keys=True)
+
+
+def prune_empty_dirs(directory, stop_at):
+    stop_at = os.path.abspath(stop_at)
+    directory = os.path.abspath(directory)
+    while directory != stop_at and directory.startswith(stop_at + os.sep):
+        if os.listdir(directory):
+            break
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import os
+import shutil
+from fileutil import atomic_open
+
+# Bump whenever a change to the markdown parser or serializer changes the html it produces,
+# so entries written by an older parser are never served again
+PARSER_VERSION = 4
+PARSE_CACHE_SIZE = 64 * 1024 * 1024
+
+
+# Rendered page bodies on disk, so a page whose markdown is unchanged only has to be templated
+# again. One file per entry lets worker processes share the cache without coordinating, and an
+# entry's mtime doubles as its last use for LRU eviction in trim().
+class ParseCache:
+
+    def __init__(self, directory, max_bytes=PARSE_CACHE_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, source_hash, base_path, assets_key=""):
+        # assets_key identifies the fingerprinted asset names, which end up in the cached body
+        return hashlib.sha256(f"{PARSER_VERSION}\0{source_hash}\0{base_path}\0{assets_key}".encode()).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".html")
+
+    def get(self, key):
+        path = self.entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                metadata = json.loads(file.readline())
+                body = file.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return metadata, body
+
+    def put(self, key, metadata, body):
+        # The page metadata as one line of JSON, then the body html
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_open(path) as file:
+            file.write(json.dumps(metadata, ensure_ascii=False))
+            file.write("\n")
+            file.write(body)
+
+    def entries(self):
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if entry.is_file() and entry.name.endswith(".html"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def trim(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        if os.path.exists(self.directory):
+            shutil.rmtree(self.directory)
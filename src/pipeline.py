@@ -0,0 +1,88 @@
+import queue
+import threading
+import traceback
+from fileutil import atomic_open
+
+# Pages held in memory on each side of the renderer. Both queues are bounded, so a fast reader
+# or a slow disk makes the other side wait instead of buffering the whole site.
+PREFETCH_DEPTH = 16
+WRITE_BACKLOG = 16
+DONE = object()
+
+
+def read_text(path):
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def prefetch(items, read, depth=PREFETCH_DEPTH):
+    # Yields (item, data, error) in order while a reader thread works up to depth items ahead
+    ready = queue.Queue(depth)
+    stop = threading.Event()
+
+    def reader():
+        for item in items:
+            if stop.is_set():
+                break
+            try:
+                ready.put((item, read(item), None))
+            except Exception:
+                ready.put((item, None, traceback.format_exc()))
+        ready.put(DONE)
+
+    thread = threading.Thread(target=reader, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            job = ready.get()
+            if job is DONE:
+                break
+            yield job
+    finally:
+        # A consumer that stops early drains the queue so the reader is never left blocked on put
+        if thread.is_alive():
+            stop.set()
+            while ready.get() is not DONE:
+                pass
+        thread.join()
+
+
+class BackgroundWriter:
+    # Writes finished pages from a dedicated thread. Keys whose write is over, whether it
+    # succeeded or not, are added to finished; failures are kept per key for the caller
+
+    def __init__(self, backlog=WRITE_BACKLOG):
+        self.pending = queue.Queue(backlog)
+        self.errors = {}
+        self.finished = set()
+        self.thread = threading.Thread(target=self.run, name="writer", daemon=True)
+        self.thread.start()
+
+    def write(self, key, path, parts):
+        self.pending.put((key, path, parts))
+
+    def run(self):
+        while True:
+            job = self.pending.get()
+            if job is DONE:
+                return
+            key, path, parts = job
+            try:
+                with atomic_open(str(path)) as file:
+                    file.writelines(parts)
+            except Exception:
+                self.errors[key] = traceback.format_exc()
+            self.finished.add(key)
+
+    def close(self):
+        if self.thread.is_alive():
+            self.pending.put(DONE)
+            self.thread.join()
+        return self.errors
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
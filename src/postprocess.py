@@ -0,0 +1,233 @@
+import gzip
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from fileutil import atomic_open
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Text types a static server can send precompressed, anything smaller than COMPRESS_MIN_SIZE
+# fits in a packet or two and is left alone
+COMPRESSIBLE = (".html", ".css", ".js", ".json", ".xml", ".svg", ".txt")
+COMPRESS_MIN_SIZE = 256
+COMPRESSED_SUFFIXES = (".gz", ".br")
+# Below this many files the pool costs more to start than it saves
+POOL_THRESHOLD = 32
+
+RAW_HTML_PATTERN = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.S | re.I)
+HTML_COMMENT_PATTERN = re.compile(r"<!--(?!\[if).*?-->", re.S)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# Whitespace next to these tags is never rendered, so it can go entirely
+BLOCK_TAG_PATTERN = re.compile(
+    r"\s*(</?(?:html|head|body|title|meta|link|base|article|section|nav|header|footer|main|aside|div|p|"
+    r"ul|ol|li|dl|dt|dd|h[1-6]|blockquote|pre|table|thead|tbody|tr|th|td|hr|br|figure|figcaption)\b[^>]*>)\s*",
+    re.I)
+CSS_TOKEN_PATTERN = re.compile(r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')|/\*.*?\*/", re.S)
+CSS_PUNCTUATION_PATTERN = re.compile(r"\s*([{};,>])\s*")
+
+
+class PostprocessResult:
+
+    def __init__(self):
+        self.processed = []
+        self.skipped = []
+        self.removed = []
+        self.bytes_before = 0
+        self.bytes_after = 0
+
+    def __repr__(self):
+        return (f"PostprocessResult(processed: {len(self.processed)}, skipped: {len(self.skipped)}, "
+                f"removed: {len(self.removed)})")
+
+
+def collapse_whitespace(match):
+    return "\n" if "\n" in match.group(0) else " "
+
+
+def minify_html(html):
+    # Conservative: comments go, whitespace runs shrink to one character and disappear around
+    # block tags. pre, textarea, script and style keep their contents byte for byte
+    parts = []
+    for index, segment in enumerate(RAW_HTML_PATTERN.split(html)):
+        # split yields text, raw element, tag name, text, ...
+        if index % 3 == 1:
+            parts.append(segment)
+        elif index % 3 == 0:
+            segment = HTML_COMMENT_PATTERN.sub("", segment)
+            segment = WHITESPACE_PATTERN.sub(collapse_whitespace, segment)
+            parts.append(BLOCK_TAG_PATTERN.sub(r"\1", segment))
+    return "".join(parts).strip()
+
+
+def minify_css(css):
+    # Strings are kept as they are, comments dropped, and whitespace removed around punctuation
+    # that never needs it. Spaces inside selectors and values, like "a :hover" or calc(), stay
+    parts = []
+    position = 0
+    for match in CSS_TOKEN_PATTERN.finditer(css):
+        parts.append(minify_css_code(css[position:match.start()]))
+        if match.group(1):
+            parts.append(match.group(1))
+        position = match.end()
+    parts.append(minify_css_code(css[position:]))
+    return "".join(parts).strip()
+
+
+def minify_css_code(code):
+    code = WHITESPACE_PATTERN.sub(" ", code)
+    code = CSS_PUNCTUATION_PATTERN.sub(r"\1", code)
+    return code.replace(";}", "}")
+
+
+MINIFIERS = {".html": minify_html, ".css": minify_css}
+
+
+def file_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def signature(path, digest, options, siblings):
+    # What this stage left behind: the file's stat and hash, the options it ran with and the
+    # compressed siblings it wrote
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns, digest, options, list(siblings)]
+
+
+def options_key(minify, compress):
+    return ("m" if minify else "") + ("c" if compress else "") + ("b" if compress and brotli is not None else "")
+
+
+def sibling_suffixes(relative_path, size, compress):
+    if not compress or size < COMPRESS_MIN_SIZE or not relative_path.endswith(COMPRESSIBLE):
+        return ()
+    return (".gz", ".br") if brotli is not None else (".gz",)
+
+
+def write_sibling(path, suffix, data):
+    if suffix == ".gz":
+        # mtime=0 keeps the bytes identical between builds
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    else:
+        compressed = brotli.compress(data)
+    if len(compressed) >= len(data):
+        remove_sibling(path, suffix)
+        return False
+    with atomic_open(path + suffix, "wb") as file:
+        file.write(compressed)
+    return True
+
+
+def remove_sibling(path, suffix):
+    if os.path.exists(path + suffix):
+        os.remove(path + suffix)
+
+
+def process_file(task):
+    # Runs in a worker. Returns (relative path, signature, bytes before, bytes after), with a
+    # None signature when the file still hashes to what this stage last wrote
+    output_root, relative_path, recorded, minify, compress = task
+    path = os.path.join(output_root, relative_path)
+    options = options_key(minify, compress)
+    with open(path, "rb") as file:
+        data = file.read()
+    digest = file_hash(data)
+    if (recorded is not None and recorded[2:4] == [digest, options]
+            and all(os.path.exists(path + suffix) for suffix in recorded[4])):
+        return relative_path, None, len(data), len(data)
+
+    before = len(data)
+    minifier = MINIFIERS.get(os.path.splitext(relative_path)[1]) if minify else None
+    if minifier is not None:
+        minified = minifier(data.decode("utf-8")).encode("utf-8")
+        if minified != data:
+            data = minified
+            digest = file_hash(data)
+            # atomic_open replaces the file, so a hardlinked asset never changes static/ through it
+            with atomic_open(path, "wb") as file:
+                file.write(data)
+
+    suffixes = sibling_suffixes(relative_path, len(data), compress)
+    written = []
+    for suffix in COMPRESSED_SUFFIXES:
+        if suffix in suffixes and write_sibling(path, suffix, data):
+            written.append(suffix)
+        elif suffix not in suffixes:
+            remove_sibling(path, suffix)
+    return relative_path, signature(path, digest, options, written), before, len(data)
+
+
+def scan_outputs(root, relative_root=""):
+    paths = []
+    with os.scandir(os.path.join(root, relative_root)) as entries:
+        for entry in entries:
+            relative_path = os.path.join(relative_root, entry.name)
+            if entry.is_dir():
+                paths.extend(scan_outputs(root, relative_path))
+            elif entry.is_file() and not entry.name.endswith(COMPRESSED_SUFFIXES) and not entry.name.startswith("."):
+                paths.append(relative_path)
+    return paths
+
+
+def postprocess(output_root, manifest, minify=True, compress=True, jobs=1, paths=None):
+    # Minifies html and css in the output and writes .gz/.br siblings. The manifest keeps the hash
+    # of every file as this stage left it, so a file nobody rewrote since is only read and hashed.
+    # paths, relative to output_root, limits the pass to files a rebuild wrote or removed; every
+    # other file keeps what the manifest recorded for it
+    result = PostprocessResult()
+    if paths is None:
+        outputs = scan_outputs(output_root)
+        processed = {}
+    else:
+        paths = set(paths)
+        outputs = [relative_path for relative_path in paths
+                   if os.path.isfile(os.path.join(output_root, relative_path))]
+        processed = {relative_path: recorded for relative_path, recorded in manifest.processed.items()
+                     if relative_path not in paths}
+    candidates = [relative_path for relative_path in sorted(outputs)
+                  if (minify and relative_path.endswith(tuple(MINIFIERS))) or
+                  (compress and relative_path.endswith(COMPRESSIBLE))]
+    tasks = [(output_root, relative_path, manifest.processed.get(relative_path), minify, compress)
+             for relative_path in candidates]
+
+    if jobs > 1 and len(tasks) >= POOL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            outcomes = list(executor.map(process_file, tasks, chunksize=max(1, len(tasks) // (jobs * 4))))
+    else:
+        outcomes = [process_file(task) for task in tasks]
+
+    for relative_path, file_signature, before, after in outcomes:
+        if file_signature is None:
+            processed[relative_path] = manifest.processed[relative_path]
+            result.skipped.append(relative_path)
+        else:
+            processed[relative_path] = file_signature
+            result.processed.append(relative_path)
+            result.bytes_before += before
+            result.bytes_after += after
+
+    # Siblings of files that are gone, or no longer processed, go with them
+    for relative_path in sorted(set(manifest.processed) - set(processed)):
+        path = os.path.join(output_root, relative_path)
+        for suffix in COMPRESSED_SUFFIXES:
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+                result.removed.append(relative_path + suffix)
+    manifest.processed = processed
+    return result
+
+
+def is_processed_copy(manifest, relative_path, source_stat, destination):
+    # True when destination is this stage's output for an unchanged static file, which the asset
+    # sync would otherwise see as modified and copy over again on every build
+    recorded = manifest.processed.get(relative_path)
+    if recorded is None or manifest.assets.get(relative_path) != [source_stat.st_size, source_stat.st_mtime_ns]:
+        return False
+    try:
+        destination_stat = os.stat(destination)
+    except FileNotFoundError:
+        return False
+    return [destination_stat.st_size, destination_stat.st_mtime_ns] == recorded[:2]
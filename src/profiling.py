@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+STAGES = (
+    "asset copy",
+    "images",
+    "file read",
+    "block parsing",
+    "inline parsing",
+    "html serialization",
+    "templating",
+    "write",
+    "link check",
+    "postprocess",
+)
+
+# The profiler of this process, None when profiling is off. Instrumented code calls stage(),
+# which is a shared no-op context manager unless a profiler has been installed.
+active_profiler = None
+NULL_STAGE = nullcontext()
+
+
+def stage(name):
+    if active_profiler is None:
+        return NULL_STAGE
+    return active_profiler.stage(name)
+
+
+def install_profiler(profiler):
+    global active_profiler
+    active_profiler = profiler
+    return profiler
+
+
+class StageTimer:
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.enter(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.profiler.exit()
+        return False
+
+
+class BuildProfiler:
+    # Stage times are exclusive: entering a nested stage (inline parsing inside block parsing)
+    # pauses the outer one, so per stage numbers add up to the page total
+
+    def __init__(self, trace=False):
+        self.pages = {}
+        self.totals = {}
+        self.hooks = []
+        self.trace = trace
+        self.events = []
+        self.current_page = None
+        self.stack = []
+
+    def add_hook(self, hook):
+        # hook(page, stage, wall_seconds, cpu_seconds) runs whenever a stage finishes
+        self.hooks.append(hook)
+
+    def stage(self, name):
+        return StageTimer(self, name)
+
+    @contextmanager
+    def page(self, source):
+        self.current_page = source
+        self.pages.setdefault(source, {})
+        try:
+            yield
+        finally:
+            self.current_page = None
+
+    def enter(self, name):
+        wall, cpu = time.perf_counter(), time.process_time()
+        if self.stack:
+            self.pause(self.stack[-1], wall, cpu)
+        self.stack.append([name, wall, cpu, 0.0, 0.0, wall])
+
+    def exit(self):
+        wall, cpu = time.perf_counter(), time.process_time()
+        frame = self.stack.pop()
+        self.pause(frame, wall, cpu)
+        name, _, _, wall_total, cpu_total, started = frame
+        self.record(self.current_page, name, wall_total, cpu_total)
+        if self.trace:
+            self.events.append({
+                "name": name, "cat": "build", "ph": "X",
+                "ts": started * 1e6, "dur": (wall - started) * 1e6,
+                "pid": os.getpid(), "tid": threading.get_ident(),
+                "args": {"page": self.current_page},
+            })
+        if self.stack:
+            self.stack[-1][1] = wall
+            self.stack[-1][2] = cpu
+
+    def pause(self, frame, wall, cpu):
+        frame[3] += wall - frame[1]
+        frame[4] += cpu - frame[2]
+
+    def record(self, page, name, wall, cpu):
+        totals = self.totals.setdefault(name, [0.0, 0.0])
+        totals[0] += wall
+        totals[1] += cpu
+        if page is not None:
+            timings = self.pages.setdefault(page, {}).setdefault(name, [0.0, 0.0])
+            timings[0] += wall
+            timings[1] += cpu
+        for hook in self.hooks:
+            hook(page, name, wall, cpu)
+
+    def take_page(self, page):
+        # Used by worker processes to ship one page's timings and trace events back with its result
+        events = [event for event in self.events if event["args"]["page"] == page]
+        self.events = [event for event in self.events if event["args"]["page"] != page]
+        return self.pages.pop(page, {}), events
+
+    def merge_page(self, page, timings, events=()):
+        for name, (wall, cpu) in timings.items():
+            self.record(page, name, wall, cpu)
+        self.events.extend(events)
+
+    def slowest_pages(self, count=10):
+        page_totals = [(sum(wall for wall, _ in timings.values()), page) for page, timings in self.pages.items()]
+        page_totals.sort(key=lambda item: (-item[0], item[1]))
+        return page_totals[:count]
+
+    def report(self, slowest=10):
+        lines = [f" {'Stage':<20}{'wall ms':>12}{'cpu ms':>12}"]
+        names = [name for name in STAGES if name in self.totals]
+        names += sorted(name for name in self.totals if name not in STAGES)
+        for name in names:
+            wall, cpu = self.totals[name]
+            lines.append(f" {name:<20}{wall * 1000:>12.2f}{cpu * 1000:>12.2f}")
+        if self.pages:
+            lines.append(" Slowest pages:")
+            for wall, page in self.slowest_pages(slowest):
+                lines.append(f" {wall * 1000:>10.2f} ms  {page}")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path):
+        with open(path, "w") as file:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, file)
@@ -0,0 +1,115 @@
+import os
+import random
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+WORDS = ("middle", "earth", "ring", "hobbit", "elf", "river", "mountain", "shadow", "light",
+         "song", "road", "forest", "tower", "king", "sword", "star", "journey", "council")
+
+
+class SiteShape:
+
+    def __init__(self, pages=100, depth=2, paragraphs=12, inline_density=0.2, list_length=6, code_lines=8, seed=0):
+        self.pages = pages
+        self.depth = depth
+        self.paragraphs = paragraphs
+        self.inline_density = inline_density
+        self.list_length = list_length
+        self.code_lines = code_lines
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __repr__(self):
+        return f"SiteShape({self.as_dict()})"
+
+
+def synthetic_sentence(rng, words, inline_density):
+    parts = []
+    for i in range(words):
+        word = rng.choice(WORDS)
+        if rng.random() < inline_density:
+            markup = rng.randrange(5)
+            if markup == 0:
+                word = f"**{word}**"
+            elif markup == 1:
+                word = f"_{word}_"
+            elif markup == 2:
+                word = f"`{word}()`"
+            elif markup == 3:
+                word = f"[{word}](/{rng.choice(WORDS)}/{i})"
+            else:
+                word = f"![{word}](/images/{rng.choice(WORDS)}.png)"
+        parts.append(word)
+    return " ".join(parts).capitalize() + "."
+
+
+def synthetic_page(rng, title, shape):
+    blocks = [f"# {title}"]
+    for i in range(shape.paragraphs):
+        kind = i % 6
+        if kind == 2 and shape.list_length:
+            blocks.append("\n".join(f"- {synthetic_sentence(rng, 6, shape.inline_density)}"
+                                    for _ in range(shape.list_length)))
+        elif kind == 3 and shape.list_length:
+            blocks.append("\n".join(f"{n}. {synthetic_sentence(rng, 6, shape.inline_density)}"
+                                    for n in range(1, shape.list_length + 1)))
+        elif kind == 4 and shape.code_lines:
+            code = "\n".join(f"    value_{n} = compute({n})" for n in range(shape.code_lines))
+            blocks.append(f"```\n{code}\n```")
+        elif kind == 5:
+            blocks.append(f"## {synthetic_sentence(rng, 3, 0)}")
+            blocks.append(f"> {synthetic_sentence(rng, 12, shape.inline_density)}")
+        else:
+            blocks.append("\n".join(synthetic_sentence(rng, 14, shape.inline_density) for _ in range(3)))
+    return "\n\n".join(blocks) + "\n"
+
+
+def page_directory(index, depth):
+    # Spreads pages over a tree of nested sections, depth levels deep
+    parts = []
+    for level in range(depth):
+        parts.append(f"section{(index // (4 ** level)) % 4}")
+    return os.path.join(*parts, f"page{index}") if parts else f"page{index}"
+
+
+def generate_site(root, shape):
+    rng = random.Random(shape.seed)
+    content = os.path.join(root, "content")
+    static = os.path.join(root, "static")
+    os.makedirs(os.path.join(static, "images"), exist_ok=True)
+
+    write_file(os.path.join(root, "template.html"), TEMPLATE)
+    write_file(os.path.join(static, "index.css"), "body { font-family: sans-serif; }\n")
+    for word in WORDS:
+        write_file(os.path.join(static, "images", f"{word}.png"), word * 64)
+
+    write_file(os.path.join(content, "index.md"), synthetic_page(rng, "Home", shape))
+    for index in range(1, shape.pages):
+        path = os.path.join(content, page_directory(index, shape.depth), "index.md")
+        write_file(path, synthetic_page(rng, f"Page {index}", shape))
+
+    return {
+        "content": content,
+        "static": static,
+        "template": os.path.join(root, "template.html"),
+    }
+
+
+def write_file(path, contents):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(contents)
@@ -0,0 +1,70 @@
+import re
+from fingerprint import fingerprinted_url
+
+SLOT_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+URL_ATTRIBUTE_PATTERN = re.compile(r'(href|src)="/([^"]*)"')
+
+
+class Template:
+
+    def __init__(self, source, base_path="/", assets=None, images=None):
+        self.base_path = base_path
+        # {"/index.css": "/index.3f9a1c2b7d.css"}, applied to the chrome here and to page content
+        # by generate.url_rewriter
+        self.assets = assets or {}
+        # Responsive image props by url, see images.build_images, applied to content img nodes
+        self.images = images or {}
+        # The base path and fingerprinted asset names are baked into the template chrome once, not per rendered page
+        self.asset_urls = {}
+        source = rewrite_base_path(source, base_path, self.assets, self.asset_urls)
+
+        self.segments = []
+        self.slots = {}
+        self.slot_names = {}
+        position = 0
+        for match in SLOT_PATTERN.finditer(source):
+            self.segments.append(source[position:match.start()])
+            self.slots.setdefault(match.group(1), []).append(len(self.segments))
+            self.slot_names[len(self.segments)] = match.group(1)
+            self.segments.append(match.group(0))
+            position = match.end()
+        self.segments.append(source[position:])
+
+    @classmethod
+    def load(cls, template_path, base_path="/", assets=None, images=None):
+        with open(template_path, "r") as template_file:
+            return cls(template_file.read(), base_path, assets, images)
+
+    def write(self, write, **values):
+        # Slot values may be strings, html nodes or callables taking write, which serialize straight
+        # into the output instead of being rendered to a string first. Slots without a value keep
+        # their placeholder text, as str.replace used to.
+        for index, segment in enumerate(self.segments):
+            name = self.slot_names.get(index)
+            if name is None or name not in values:
+                write(segment)
+            elif hasattr(values[name], "write_html"):
+                values[name].write_html(write)
+            elif callable(values[name]):
+                values[name](write)
+            else:
+                write(values[name])
+
+    def __repr__(self):
+        return f"Template(slots: {list(self.slots)}, base_path: {self.base_path})"
+
+
+def rewrite_base_path(html, base_path, assets=None, used=None):
+    # Root-relative href and src values get the base path and, when assets maps them, their
+    # fingerprinted name; used collects the asset urls that were replaced
+    if base_path == "/" and not assets:
+        return html
+
+    def rewrite(match):
+        url = "/" + match.group(2)
+        rewritten = fingerprinted_url(url, assets)
+        if rewritten != url and used is not None:
+            used[url] = rewritten
+        return f'{match.group(1)}="{base_path}{rewritten[1:]}"'
+
+    return URL_ATTRIBUTE_PATTERN.sub(rewrite, html)
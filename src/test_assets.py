@@ -0,0 +1,63 @@
+import os
+import time
+import unittest
+
+from assets import scan_files, sync_static
+from fixtures import SiteBuildTestCase
+
+
+class TestSyncStatic(SiteBuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("static/index.css", "body {}")
+        self.write("static/images/a.png", "png-a")
+        self.write("static/images/b.png", "png-b")
+
+    def test_scan_files(self):
+        self.assertEqual(sorted(scan_files(self.static)), ["images/a.png", "images/b.png", "index.css"])
+
+    def test_initial_sync_copies_everything(self):
+        result = sync_static(self.static, self.docs, self.manifest)
+        self.assertEqual(result.copied, ["images/a.png", "images/b.png", "index.css"])
+        self.assertEqual(self.read("images/b.png"), "png-b")
+
+    def test_unchanged_files_are_skipped(self):
+        sync_static(self.static, self.docs, self.manifest)
+        self.write("static/index.css", "body { color: red }")
+        result = sync_static(self.static, self.docs, self.manifest)
+        self.assertEqual(result.copied, ["index.css"])
+        self.assertEqual(result.skipped, ["images/a.png", "images/b.png"])
+        self.assertEqual(self.read("index.css"), "body { color: red }")
+
+    def test_hash_mode_skips_touched_files(self):
+        sync_static(self.static, self.docs, self.manifest)
+        future = time.time() + 100
+        os.utime(os.path.join(self.static, "index.css"), (future, future))
+        self.assertEqual(sync_static(self.static, self.docs, self.manifest, use_hash=True).copied, [])
+        self.assertEqual(sync_static(self.static, self.docs, self.manifest).copied, [])
+
+    def test_deleted_files_are_pruned_but_pages_kept(self):
+        sync_static(self.static, self.docs, self.manifest)
+        self.write("docs/index.html", "generated page")
+        os.remove(os.path.join(self.static, "images", "a.png"))
+        os.remove(os.path.join(self.static, "images", "b.png"))
+        os.rmdir(os.path.join(self.static, "images"))
+
+        result = sync_static(self.static, self.docs, self.manifest)
+        self.assertEqual(result.removed, ["images/a.png", "images/b.png"])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.html")))
+
+    def test_link_mode_hardlinks(self):
+        sync_static(self.static, self.docs, self.manifest, link=True)
+        source = os.stat(os.path.join(self.static, "index.css"))
+        destination = os.stat(os.path.join(self.docs, "index.css"))
+        self.assertEqual(source.st_ino, destination.st_ino)
+
+    def test_missing_source_raises(self):
+        with self.assertRaises(ValueError):
+            sync_static(os.path.join(self.root, "missing"), self.docs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -374,5 +374,118 @@ class TestUnorderedListToHtmlNode(unittest.TestCase):
         html_node = unordered_list_to_html_node(block)
         self.assertEqual(html_node.tag, "ul")
     
+class TestIterBlocks(unittest.TestCase):
+    def test_iter_blocks_types(self):
+        lines = [
+            "# Heading",
+            "",
+            "> quote",
+            "> more",
+            "",
+            "- one",
+            "- two",
+            "",
+            "1. first",
+            "2. second",
+            "",
+            "just text",
+        ]
+        self.assertEqual(list(iter_blocks(lines)), [
+            (BlockType.HEADING, "# Heading"),
+            (BlockType.QUOTE, "> quote\n> more"),
+            (BlockType.UNORDERED_LIST, "- one\n- two"),
+            (BlockType.ORDERED_LIST, "1. first\n2. second"),
+            (BlockType.PARAGRAPH, "just text"),
+        ])
+
+    def test_iter_blocks_downgrades_to_paragraph(self):
+        blocks = list(iter_blocks(["- one", "not a list item", "", "1. a", "3. c"]))
+        self.assertEqual([block_type for block_type, _ in blocks], [BlockType.PARAGRAPH, BlockType.PARAGRAPH])
+
+    def test_iter_blocks_is_lazy(self):
+        def lines():
+            yield "first paragraph\n"
+            yield "\n"
+            raise AssertionError("read past the first block")
+
+        self.assertEqual(next(iter_blocks(lines())), (BlockType.PARAGRAPH, "first paragraph"))
+
+    def test_fenced_code_keeps_blank_lines(self):
+        markdown = "```\nline one\n\nline two\n```\nafter"
+        self.assertEqual(list(iter_blocks(markdown.split("\n"))), [
+            (BlockType.CODE, "```\nline one\n\nline two\n```"),
+            (BlockType.PARAGRAPH, "after"),
+        ])
+        html = markdown_to_html_node(markdown).to_html()
+        self.assertEqual(html, "<div><pre><code>line one\n\nline two\n</code></pre><p>after</p></div>")
+
+    def test_opening_fence_with_trailing_whitespace(self):
+        for fence in ("``` ", "````"):
+            markdown = f"{fence}\nprint(1)\n# not a heading\n```"
+            self.assertEqual(list(iter_blocks(markdown.split("\n"))),
+                             [(BlockType.CODE, markdown.strip())])
+        self.assertEqual(list(iter_blocks(["```one line```  "])), [(BlockType.CODE, "```one line```")])
+
+    def test_fence_closes_only_on_its_own_line(self):
+        markdown = "```\nfoo```\nbar\n```"
+        self.assertEqual(list(iter_blocks(markdown.split("\n"))), [(BlockType.CODE, markdown)])
+        self.assertEqual(markdown_to_html_node(markdown).to_html(),
+                         "<div><pre><code>foo```\nbar\n</code></pre></div>")
+
+    def test_whitespace_only_line_splits_blocks(self):
+        self.assertEqual(markdown_to_blocks("first\n   \nsecond"), ["first", "second"])
+
+    def test_unclosed_fence_falls_back_to_paragraphs(self):
+        blocks = list(iter_blocks(["```", "code", "", "- item"]))
+        self.assertEqual(blocks, [(BlockType.PARAGRAPH, "```\ncode"), (BlockType.UNORDERED_LIST, "- item")])
+
+    def test_iter_blocks_matches_block_to_block_type(self):
+        markdown = "# Title\n\n- a\n- b\n\n> q\n\nplain\ntext\n\n1. x\n2. y"
+        for block_type, block in iter_blocks(markdown.split("\n")):
+            self.assertEqual(block_type, block_to_block_type(block))
+
+    def test_file_lines(self):
+        import io
+        markdown = "# Title\n\nSome **bold** text\n"
+        self.assertEqual(
+            markdown_lines_to_html_node(io.StringIO(markdown)).to_html(),
+            markdown_to_html_node(markdown).to_html(),
+        )
+
+class TestInlineCache(unittest.TestCase):
+    def tearDown(self):
+        configure_inline_cache(INLINE_CACHE_SIZE)
+
+    def test_repeated_text_hits_cache(self):
+        configure_inline_cache(16)
+        first = text_to_children("A **repeated** footer")
+        second = text_to_children("A **repeated** footer")
+        info = inline_cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertIs(first[1], second[1])
+
+    def test_cached_nodes_are_immutable(self):
+        configure_inline_cache(16)
+        children = text_to_children("[link](/x)")
+        with self.assertRaises(AttributeError):
+            children[0].value = "changed"
+        with self.assertRaises(TypeError):
+            children[0].props["href"] = "/y"
+
+    def test_cache_size_is_bounded(self):
+        configure_inline_cache(2)
+        for text in ("one", "two", "three", "one"):
+            text_to_children(text)
+        info = inline_cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize, info.maxsize), (0, 4, 2, 2))
+
+    def test_cache_disabled(self):
+        configure_inline_cache(0)
+        text_to_children("same")
+        text_to_children("same")
+        self.assertEqual(inline_cache_info().hits, 0)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
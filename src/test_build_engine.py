@@ -0,0 +1,87 @@
+import os
+import unittest
+
+from build_engine import build_pages, collect_pages, summarize
+from fixtures import SiteBuildTestCase
+
+TEMPLATE = '<html><title>{{ Title }}</title><link href="/index.css"><body>{{ Content }}</body></html>'
+
+
+class TestBuildEngine(SiteBuildTestCase):
+    template_source = TEMPLATE
+
+    def setUp(self):
+        super().setUp()
+        self.write("content/index.md", "# Home\n\n[Post](/blog/post)")
+        self.write("content/blog/post/index.md", "# Post\n\nSome **bold** text")
+        self.write("content/blog/other/index.md", "# Other\n\n- one\n- two")
+
+    def read_outputs(self, docs):
+        outputs = {}
+        for source, output in collect_pages(self.content, docs):
+            with open(output) as file:
+                outputs[os.path.relpath(output, docs)] = file.read()
+        return outputs
+
+    def test_collect_pages_is_sorted_and_maps_to_html(self):
+        docs = os.path.join(self.root, "docs")
+        pages = collect_pages(self.content, docs)
+        self.assertEqual(
+            [os.path.relpath(output, docs) for _, output in pages],
+            ["blog/other/index.html", "blog/post/index.html", "index.html"],
+        )
+
+    def test_serial_and_parallel_outputs_match(self):
+        serial_docs = os.path.join(self.root, "serial")
+        parallel_docs = os.path.join(self.root, "parallel")
+        serial = build_pages(collect_pages(self.content, serial_docs), self.template, "/base/", jobs=1)
+        parallel = build_pages(collect_pages(self.content, parallel_docs), self.template, "/base/", jobs=3)
+
+        self.assertTrue(all(result.ok for result in serial + parallel))
+        self.assertEqual([r.source for r in serial], [r.source for r in parallel])
+        self.assertEqual(self.read_outputs(serial_docs), self.read_outputs(parallel_docs))
+        self.assertIn('<a href="/base/blog/post">Post</a>', self.read_outputs(serial_docs)["index.html"])
+
+    def test_errors_are_collected_per_page(self):
+        self.write("content/broken/index.md", "No title here")
+        docs = os.path.join(self.root, "docs")
+        for jobs in (1, 2):
+            results = build_pages(collect_pages(self.content, docs), self.template, "/", jobs=jobs)
+            failed = [result for result in results if not result.ok]
+            self.assertEqual(len(failed), 1)
+            self.assertTrue(failed[0].source.endswith(os.path.join("broken", "index.md")))
+            self.assertIn("No Header found", failed[0].error)
+            self.assertEqual(len([result for result in results if result.ok]), 3)
+
+    def test_manifest_skips_unchanged_pages(self):
+        self.build()
+
+        self.write("content/index.md", "# Home changed")
+        results = self.build()
+        rebuilt = [os.path.relpath(r.output, self.docs) for r in results if not r.skipped]
+        self.assertEqual(rebuilt, ["index.html"])
+
+    def test_turning_minify_off_rebuilds_pages(self):
+        # Minified pages are only undone by writing them again
+        self.build(minify=True)
+        results = self.build()
+        self.assertTrue(all(not result.skipped for result in results))
+
+    def test_summary_counts_pages_and_cache(self):
+        self.write("content/repeat/index.md", "# Repeat\n\nSome **bold** text")
+        summary = summarize(self.build())
+        self.assertEqual((summary["built"], summary["skipped"], summary["failed"]), (4, 0, 0))
+        self.assertEqual(summary["cache_hits"], 1)
+
+        self.write("content/index.md", "# Home changed")
+        summary = summarize(self.build())
+        self.assertEqual((summary["built"], summary["skipped"], summary["failed"]), (1, 3, 0))
+
+    def test_failed_pages_are_not_recorded(self):
+        self.write("content/broken/index.md", "No title here")
+        self.build()
+        self.assertNotIn(os.path.join(self.content, "broken", "index.md"), self.manifest.pages)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import os
+import unittest
+
+from config import ConfigError, SiteConfig, build_config
+from fixtures import SiteTestCase
+
+
+class TestSiteConfig(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cwd = os.getcwd()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        super().tearDown()
+
+    def write_config(self, settings, name="site.json"):
+        path = os.path.join(self.root, name)
+        with open(path, "w") as file:
+            json.dump(settings, file)
+        return path
+
+    def test_defaults(self):
+        config = SiteConfig()
+        self.assertEqual(config.content, "content")
+        self.assertEqual(config.output, "docs")
+        self.assertEqual(config.base_path, "/")
+        self.assertEqual(config.output_mode, "incremental")
+        self.assertEqual(config.manifest_path, os.path.join(".cache", "manifest.json"))
+
+    def test_unknown_setting(self):
+        with self.assertRaises(ConfigError):
+            SiteConfig(public="docs")
+
+    def test_invalid_values(self):
+        with self.assertRaises(ConfigError):
+            SiteConfig(output_mode="fast")
+        with self.assertRaises(ConfigError):
+            SiteConfig(jobs=0)
+
+    def test_load_resolves_paths_against_config_file(self):
+        path = self.write_config({"output": "/tmp/site", "content": "pages", "base_path": "/blog/"})
+        config = SiteConfig.load(path)
+        self.assertEqual(config.output, "/tmp/site")
+        self.assertEqual(config.content, os.path.join(self.root, "pages"))
+        self.assertEqual(config.base_path, "/blog/")
+        self.assertEqual(config.template, "template.html")
+
+    def test_load_invalid_json(self):
+        path = os.path.join(self.root, "site.json")
+        with open(path, "w") as file:
+            file.write("{")
+        with self.assertRaises(ConfigError):
+            SiteConfig.load(path)
+
+    def test_overrides_beat_config_file(self):
+        path = self.write_config({"jobs": 2, "output": "out"})
+        config = build_config(path, jobs=4, output=None)
+        self.assertEqual(config.jobs, 4)
+        self.assertEqual(config.output, os.path.join(self.root, "out"))
+
+    def test_defaults_resolve_against_working_directory(self):
+        os.chdir(self.root)
+        config = build_config()
+        self.assertEqual(config.content, os.path.join(self.root, "content"))
+        self.assertEqual(config.cache_dir, os.path.join(self.root, ".cache"))
+
+    def test_picks_up_site_json_in_working_directory(self):
+        self.write_config({"base_path": "/docs/"})
+        os.chdir(self.root)
+        self.assertEqual(build_config().base_path, "/docs/")
+
+
+if __name__ == "__main__":
+    unittest.main()
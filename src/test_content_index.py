@@ -0,0 +1,105 @@
+import os
+import unittest
+
+from content_index import ContentIndex
+from fixtures import SiteBuildTestCase
+from front_matter import split_front_matter
+from generate import parse_page
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split(self):
+        lines = ["---\n", "title: \"Hello: world\"\n", "tags: [a, 'b c']\n", "---\n", "# Heading\n"]
+        front_matter, rest, line_count = split_front_matter(lines)
+        self.assertEqual(front_matter, {"title": "Hello: world", "tags": ["a", "b c"]})
+        self.assertEqual(list(rest), ["# Heading\n"])
+        self.assertEqual(line_count, 4)
+
+    def test_no_front_matter(self):
+        front_matter, rest, line_count = split_front_matter(["# Heading\n", "---\n"])
+        self.assertEqual((front_matter, list(rest), line_count), ({}, ["# Heading\n", "---\n"], 0))
+
+    def test_invalid_block_is_left_alone(self):
+        lines = ["---\n", "not a key value line\n", "---\n"]
+        front_matter, rest, line_count = split_front_matter(lines)
+        self.assertEqual((front_matter, list(rest), line_count), ({}, lines, 0))
+
+    def test_unterminated_block_is_left_alone(self):
+        lines = ["---\n", "title: Hello\n"]
+        front_matter, rest, line_count = split_front_matter(lines)
+        self.assertEqual((front_matter, list(rest), line_count), ({}, lines, 0))
+
+
+class TestParsePage(unittest.TestCase):
+    def test_metadata(self):
+        metadata, _ = parse_page(["# Heading\n", "\n", "Three **short** words\n"])
+        self.assertEqual(metadata, {"title": "Heading", "summary": "Three short words", "words": 4,
+                                    "front_matter": {}, "links": []})
+
+    def test_front_matter_title_wins(self):
+        metadata, node = parse_page(["---\n", "title: Custom\n", "date: 2024-05-01\n", "---\n", "# Heading\n"])
+        self.assertEqual(metadata["title"], "Custom")
+        self.assertEqual(metadata["front_matter"], {"title": "Custom", "date": "2024-05-01"})
+        self.assertEqual(node.to_html(), "<div><h1>Heading</h1></div>")
+
+    def test_front_matter_title_without_heading(self):
+        metadata, _ = parse_page(["---\n", "title: Custom\n", "---\n", "Just text\n"])
+        self.assertEqual(metadata["title"], "Custom")
+
+
+class TestContentIndex(SiteBuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("content/index.md", "# Home\n\n[Blog](/blog)")
+        self.write("content/blog/index.md", "# Blog")
+        self.write("content/blog/first/index.md", "---\ntags: [elves]\ndate: 2024-01-02\n---\n# First\n\nHello")
+        self.write("content/blog/second/index.md", "---\ntags: [elves, rings]\n---\n# Second")
+
+    def source(self, *parts):
+        return os.path.join(self.content, *parts, "index.md")
+
+    def test_records_every_page(self):
+        self.build()
+        self.assertEqual(len(self.index), 4)
+        first = self.index.get(self.source("blog", "first"))
+        self.assertEqual((first.title, first.summary, first.words), ("First", "Hello", 2))
+        self.assertEqual((first.date, first.tags), ("2024-01-02", ["elves"]))
+        self.assertEqual(self.index.get(self.source()).links, [(3, "/blog")])
+
+    def test_round_trip(self):
+        self.build()
+        self.index.save()
+        loaded = ContentIndex.load(self.index.path)
+        self.assertEqual(list(loaded), list(self.index))
+
+    def test_unchanged_pages_keep_their_entries(self):
+        self.build()
+        self.index.save()
+        self.index = ContentIndex.load(self.index.path)
+        results = self.build()
+        self.assertTrue(all(result.skipped for result in results))
+        self.assertEqual(sorted(result.title for result in results), ["Blog", "First", "Home", "Second"])
+
+    def test_pages_missing_from_the_index_are_rebuilt(self):
+        self.build()
+        self.index = ContentIndex(self.index.path)
+        results = self.build()
+        self.assertEqual([result.reasons for result in results], [["not in the content index"]] * 4)
+        self.assertEqual(len(self.index), 4)
+
+    def test_queries(self):
+        self.build()
+        blog = os.path.join(self.content, "blog")
+        self.assertEqual([entry.title for entry in self.index.in_directory(blog)], ["First", "Second"])
+        self.assertEqual([entry.title for entry in self.index.tagged("rings")], ["Second"])
+        self.index.retain([self.source(), self.source("blog")])
+        self.assertEqual(self.index.tagged("elves"), [])
+
+    def test_unreadable_or_old_index_starts_empty(self):
+        with open(self.index.path, "w") as file:
+            file.write('{"version": 0, "fields": [], "pages": [["x"]]}')
+        self.assertEqual(len(ContentIndex.load(self.index.path)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
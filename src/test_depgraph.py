@@ -0,0 +1,86 @@
+import os
+import unittest
+
+from assets import sync_static
+from depgraph import affected_sources, asset_dependencies, invalidate
+from fixtures import SiteBuildTestCase, SiteTestCase
+from manifest import BuildManifest
+
+
+class TestDependencies(unittest.TestCase):
+    def test_asset_dependencies(self):
+        assets = {"images/cat.png": [10, 1], "index.css": [5, 2]}
+        urls = ["/images/cat.png?v=2", "images/dog.png", "//cdn.example/index.css", "/index.css#top", "/missing.png"]
+        self.assertEqual(asset_dependencies(urls, assets), {"images/cat.png": [10, 1], "index.css": [5, 2]})
+
+
+class TestInvalidation(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest = BuildManifest(os.path.join(self.root, "manifest.json"))
+        self.manifest.assets = {"cat.png": [10, 1]}
+        self.pages = []
+        for name in ("index", "post", "list"):
+            output = os.path.join(self.root, f"{name}.html")
+            with open(output, "w") as file:
+                file.write("")
+            self.pages.append((f"{name}.md", output))
+        self.manifest.record("index.md", "h-index", "t", self.pages[0][1], "/", {"cat.png": [10, 1]})
+        self.manifest.record("post.md", "h-post", "t", self.pages[1][1], "/")
+        self.manifest.record("list.md", "h-list", "t", self.pages[2][1], "/")
+        self.hashes = {"index.md": "h-index", "post.md": "h-post", "list.md": "h-list"}
+
+    def test_nothing_changed(self):
+        self.assertEqual(invalidate(self.pages, self.manifest, self.hashes, "t", "/"), {})
+
+    def test_changed_asset_invalidates_its_pages(self):
+        self.manifest.assets["cat.png"] = [11, 2]
+        self.assertEqual(invalidate(self.pages, self.manifest, self.hashes, "t", "/"),
+                         {"index.md": ["asset cat.png changed"]})
+
+    def test_changed_page_invalidates_only_itself(self):
+        self.hashes["post.md"] = "h-post-2"
+        self.assertEqual(invalidate(self.pages, self.manifest, self.hashes, "t", "/"),
+                         {"post.md": ["source changed"]})
+
+    def test_template_change_invalidates_everything(self):
+        stale = invalidate(self.pages, self.manifest, self.hashes, "t2", "/")
+        self.assertEqual(sorted(stale), ["index.md", "list.md", "post.md"])
+        self.assertIn("template changed", stale["post.md"])
+
+    def test_affected_sources(self):
+        self.assertEqual(affected_sources(self.manifest, ["post.md"], []), ["post.md"])
+        self.assertEqual(affected_sources(self.manifest, [], ["cat.png"]), ["index.md"])
+        self.assertEqual(affected_sources(self.manifest, [], ["other.png"]), [])
+
+
+class TestBuildDependencies(SiteBuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("content/index.md", "# Home\n\n![cat](/images/cat.png)")
+        self.write("content/post/index.md", "# Post\n\n[Home](/)")
+        self.write("static/images/cat.png", "cat")
+
+    def build(self):
+        sync_static(self.static, self.docs, self.manifest)
+        return [result for result in super().build() if not result.skipped]
+
+    def test_build_records_asset_edges(self):
+        self.build()
+        self.assertEqual(list(self.manifest.pages[os.path.join(self.content, "index.md")]["assets"]),
+                         ["images/cat.png"])
+        self.assertEqual(self.manifest.pages[os.path.join(self.content, "post", "index.md")]["assets"], {})
+
+    def test_asset_change_rebuilds_only_referencing_pages(self):
+        self.build()
+        self.write("static/images/cat.png", "a bigger cat")
+        rebuilt = self.build()
+        self.assertEqual([result.source for result in rebuilt], [os.path.join(self.content, "index.md")])
+        self.assertEqual(rebuilt[0].reasons, ["asset images/cat.png changed"])
+
+    def test_reasons_for_new_pages(self):
+        self.assertEqual({tuple(result.reasons) for result in self.build()}, {("new page",)})
+
+
+if __name__ == "__main__":
+    unittest.main()
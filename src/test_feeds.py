@@ -0,0 +1,107 @@
+import json
+import os
+import unittest
+import xml.etree.ElementTree as ElementTree
+
+from build_engine import collect_pages
+from content_index import ContentIndex
+from feeds import SiteFeeds, page_url
+from fixtures import SiteBuildTestCase
+from generate import page_summary
+from listings import build_listings
+from block_markdown import markdown_to_html_node
+from manifest import BuildManifest
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+
+
+class TestPageSummary(unittest.TestCase):
+    def test_first_prose_paragraph(self):
+        node = markdown_to_html_node("# Title\n\n[< Back](/)\n\n![img](/a.png)\n\nSome **bold**\nprose [here](/x).")
+        self.assertEqual(page_summary(node), "Some bold prose here.")
+
+    def test_truncated_at_word_boundary(self):
+        node = markdown_to_html_node("# Title\n\n" + "word " * 100)
+        summary = page_summary(node, limit=22)
+        self.assertEqual(summary, "word word word word…")
+
+    def test_no_paragraph(self):
+        self.assertEqual(page_summary(markdown_to_html_node("# Title")), "")
+
+
+class TestSiteFeeds(SiteBuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("content/index.md", "# Home & co\n\nWelcome <friends>.")
+        self.write("content/blog/post/index.md", "# Post\n\nSome **bold** text")
+
+    def build(self, site_url="https://example.com", jobs=1, listing_sections=()):
+        os.makedirs(self.docs, exist_ok=True)
+        pages = collect_pages(self.content, self.docs)
+        feeds = SiteFeeds(self.docs, self.content, "/base/", site_url, "Posts")
+        with feeds.open(pages):
+            results = super().build("/base/", jobs=jobs, on_result=feeds.add)
+            build_listings(self.index, self.manifest, self.template, self.content, self.docs, "/base/",
+                           listing_sections)
+            for output in sorted(self.manifest.listings):
+                feeds.add_listing(output)
+        return results
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join(self.docs, "index.html"), self.docs), "/")
+        self.assertEqual(page_url(os.path.join(self.docs, "blog", "post", "index.html"), self.docs, "/b/"),
+                         "/b/blog/post/")
+        self.assertEqual(page_url(os.path.join(self.docs, "about.html"), self.docs), "/about.html")
+
+    def test_outputs(self):
+        for jobs in (1, 2):
+            self.manifest = BuildManifest(self.manifest.path)
+            self.index = ContentIndex(self.index.path)
+            self.build(jobs=jobs)
+            self.assertEqual(json.loads(self.read("search.json")), [
+                {"url": "/base/blog/post/", "title": "Post", "summary": "Some bold text"},
+                {"url": "/base/", "title": "Home & co", "summary": "Welcome <friends>."},
+            ])
+
+            sitemap = ElementTree.fromstring(self.read("sitemap.xml"))
+            locations = [element.text for element in sitemap.iter("{http://www.sitemaps.org/schemas/sitemap/0.9}loc")]
+            self.assertEqual(locations, ["https://example.com/base/blog/post/", "https://example.com/base/"])
+
+            feed = ElementTree.fromstring(self.read("feed.xml"))
+            self.assertEqual(feed.find(f"{ATOM}title").text, "Posts")
+            entries = feed.findall(f"{ATOM}entry")
+            self.assertEqual([entry.find(f"{ATOM}title").text for entry in entries], ["Post"])
+            self.assertEqual(entries[0].find(f"{ATOM}summary").text, "Some bold text")
+
+    def test_listings_are_in_the_sitemap_only(self):
+        self.build(listing_sections=["blog"])
+        sitemap = ElementTree.fromstring(self.read("sitemap.xml"))
+        locations = [element.text for element in sitemap.iter("{http://www.sitemaps.org/schemas/sitemap/0.9}loc")]
+        self.assertEqual(locations[2:], ["https://example.com/base/blog/archive/", "https://example.com/base/blog/"])
+        self.assertEqual(len(json.loads(self.read("search.json"))), 2)
+
+    def test_unchanged_pages_come_from_the_index(self):
+        self.build()
+        results = self.build()
+        self.assertTrue(all(result.skipped for result in results))
+        self.assertEqual([entry["title"] for entry in json.loads(self.read("search.json"))], ["Post", "Home & co"])
+        self.assertIn("<title>Post</title>", self.read("feed.xml"))
+
+    def test_without_site_url_only_the_search_index(self):
+        self.build(site_url="")
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "search.json")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "sitemap.xml")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "feed.xml")))
+
+    def test_failed_build_keeps_previous_outputs(self):
+        self.build()
+        previous = self.read("search.json")
+        pages = collect_pages(self.content, self.docs)
+        with self.assertRaises(RuntimeError):
+            with SiteFeeds(self.docs, self.content).open(pages):
+                raise RuntimeError("build interrupted")
+        self.assertEqual(self.read("search.json"), previous)
+
+
+if __name__ == "__main__":
+    unittest.main()
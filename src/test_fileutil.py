@@ -0,0 +1,38 @@
+import os
+import unittest
+
+from fileutil import atomic_open
+from fixtures import SiteTestCase
+
+
+class TestAtomicOpen(SiteTestCase):
+    def test_writes_and_creates_directories(self):
+        path = os.path.join(self.root, "a", "b", "page.html")
+        with atomic_open(path) as file:
+            file.write("<p>hi</p>")
+        with open(path) as file:
+            self.assertEqual(file.read(), "<p>hi</p>")
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["page.html"])
+
+    def test_failure_keeps_previous_file(self):
+        path = os.path.join(self.root, "page.html")
+        with atomic_open(path) as file:
+            file.write("old")
+        with self.assertRaises(RuntimeError):
+            with atomic_open(path) as file:
+                file.write("new")
+                raise RuntimeError("render failed")
+        with open(path) as file:
+            self.assertEqual(file.read(), "old")
+        self.assertEqual(os.listdir(self.root), ["page.html"])
+
+    def test_binary_mode(self):
+        path = os.path.join(self.root, "data.bin")
+        with atomic_open(path, "wb") as file:
+            file.write(b"\x00\x01")
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), b"\x00\x01")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import json
+import os
+import unittest
+from unittest import mock
+
+from assets import sync_static
+from fingerprint import (ASSET_MANIFEST_FILENAME, fingerprint_assets, fingerprinted_name, fingerprinted_url,
+                         table_key)
+from fixtures import SiteBuildTestCase, render
+from manifest import hash_file
+from template import Template
+
+TEMPLATE = '<html><title>{{ Title }}</title><link href="/index.css"><body>{{ Content }}</body></html>'
+
+
+class TestUrls(unittest.TestCase):
+    def test_fingerprinted_name(self):
+        self.assertEqual(fingerprinted_name(os.path.join("images", "cat.png"), "3f9a1c2b7d0000"),
+                         os.path.join("images", "cat.3f9a1c2b7d.png"))
+
+    def test_fingerprinted_url(self):
+        assets = {"/index.css": "/index.abc.css"}
+        self.assertEqual(fingerprinted_url("/index.css", assets), "/index.abc.css")
+        self.assertEqual(fingerprinted_url("/index.css?v=1#top", assets), "/index.abc.css?v=1#top")
+        self.assertEqual(fingerprinted_url("/other.css", assets), "/other.css")
+        self.assertEqual(fingerprinted_url("/index.css", {}), "/index.css")
+
+    def test_table_key(self):
+        self.assertEqual(table_key({}), "")
+        self.assertEqual(table_key({"/a": "/b", "/c": "/d"}), table_key({"/c": "/d", "/a": "/b"}))
+
+    def test_template_chrome(self):
+        template = Template('<link href="/index.css"><img src="/logo.png"><a href="/about">',
+                            "/site/", {"/index.css": "/index.abc.css"})
+        self.assertEqual(render(template), '<link href="/site/index.abc.css"><img src="/site/logo.png">'
+                                            '<a href="/site/about">')
+        self.assertEqual(template.asset_urls, {"/index.css": "/index.abc.css"})
+
+
+class TestFingerprintAssets(SiteBuildTestCase):
+    template_source = TEMPLATE
+
+    def setUp(self):
+        super().setUp()
+        self.write("static/index.css", "body {}")
+        self.write("static/images/cat.png", "cat")
+        self.write("static/robots.txt", "User-agent: *")
+        self.write("content/index.md", "# Home\n\n![cat](/images/cat.png) [about](/about)")
+        self.write("content/about/index.md", "# About")
+
+    def fingerprint(self, enabled=True):
+        sync_static(self.static, self.docs, self.manifest)
+        return fingerprint_assets(self.static, self.docs, self.manifest, enabled)
+
+    def build(self, enabled=True):
+        return super().build("/base/", assets=self.fingerprint(enabled))
+
+    def cat_name(self):
+        return fingerprinted_name("cat.png", hash_file(os.path.join(self.static, "images", "cat.png")))
+
+    def test_copies_and_asset_manifest(self):
+        assets = self.fingerprint()
+        cat = self.cat_name()
+        self.assertEqual(assets["/images/cat.png"], f"/images/{cat}")
+        self.assertEqual(set(assets), {"/index.css", "/images/cat.png"})
+        self.assertEqual(self.read("images", cat), "cat")
+        self.assertEqual(self.read("images", "cat.png"), "cat")
+        self.assertEqual(json.loads(self.read(ASSET_MANIFEST_FILENAME))["images/cat.png"], f"images/{cat}")
+
+    def test_references_are_rewritten(self):
+        self.build()
+        page = self.read("index.html")
+        self.assertIn(f'src="/base/images/{self.cat_name()}"', page)
+        self.assertIn('href="/base/about"', page)
+        self.assertNotIn('href="/base/index.css"', page)
+
+    def test_changed_asset_gets_a_new_name(self):
+        self.build()
+        old = self.cat_name()
+        self.write("static/images/cat.png", "a different cat")
+        os.utime(os.path.join(self.static, "images", "cat.png"), ns=(1, 1))
+        results = self.build()
+        self.assertEqual([result.skipped for result in results], [True, False])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images", old)))
+        self.assertIn(f'src="/base/images/{self.cat_name()}"', self.read("index.html"))
+
+    def test_changed_chrome_asset_rebuilds_every_page(self):
+        self.build()
+        self.write("static/index.css", "body { color: red }")
+        results = self.build()
+        self.assertTrue(all(not result.skipped for result in results))
+
+    def test_unchanged_assets_are_not_hashed_again(self):
+        first = self.fingerprint()
+        with mock.patch("fingerprint.hash_file", side_effect=AssertionError("hashed again")):
+            self.assertEqual(self.fingerprint(), first)
+
+    def test_turning_it_off_removes_the_copies(self):
+        self.build()
+        cat = self.cat_name()
+        results = self.build(enabled=False)
+        self.assertTrue(all(not result.skipped for result in results))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "images", cat)))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, ASSET_MANIFEST_FILENAME)))
+        self.assertIn('src="/base/images/cat.png"', self.read("index.html"))
+
+
+if __name__ == "__main__":
+    unittest.main()
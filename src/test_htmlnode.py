@@ -1,5 +1,7 @@
+import io
 import unittest
 
+from benchmarks import bench_node_memory, bench_to_html, synthetic_document
 from htmlnode import HTMLNode, LeafNode, ParentNode
 
 class TestHTMLNode(unittest.TestCase):
@@ -96,6 +98,85 @@ class TestHTMLNode(unittest.TestCase):
         with self.assertRaisesRegex(ValueError, "Error: Tag is required"):
             parent_node.to_html()
 
+    def test_to_html_nested_missing_children(self):
+        parent_node = ParentNode("div", [LeafNode("b", "ok"), ParentNode("p", None)])
+        with self.assertRaisesRegex(ValueError, "Error: Children are required"):
+            parent_node.to_html()
+
+    def test_to_html_deep_tree(self):
+        node = LeafNode("b", "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "<b>deep</b>"))
+        self.assertTrue(html.endswith("</span>" * 5000))
+
+    def test_write_html_to_file_handle(self):
+        node = ParentNode("div", [LeafNode("a", "link", {"href": "/x"}), LeafNode(None, "text")])
+        output = io.StringIO()
+        node.write_html(output.write)
+        self.assertEqual(output.getvalue(), node.to_html())
+        self.assertEqual(output.getvalue(), '<div><a href="/x">link</a>text</div>')
+
+
+    def test_leaf_node_is_immutable(self):
+        node = LeafNode("a", "link", {"href": "/x"})
+        with self.assertRaises(AttributeError):
+            node.tag = "b"
+        with self.assertRaises(TypeError):
+            node.props["href"] = "/y"
+        self.assertEqual(repr(node), "LeafNode(a, link, {'href': '/x'})")
+
+    def test_leaf_node_copies_props(self):
+        props = {"href": "/x"}
+        node = LeafNode("a", "link", props)
+        props["href"] = "/y"
+        self.assertEqual(node.to_html(), '<a href="/x">link</a>')
+
+    def test_write_html_rewrite_props(self):
+        def rewrite(tag, props):
+            return {**props, "href": "/base" + props["href"]} if "href" in props else props
+
+        link = LeafNode("a", "link", {"href": "/x"})
+        node = ParentNode("div", [link, ParentNode("p", [link], {"class": "c"})])
+        parts = []
+        node.write_html(parts.append, rewrite)
+        self.assertEqual("".join(parts), '<div><a href="/base/x">link</a><p class="c"><a href="/base/x">link</a></p></div>')
+        self.assertEqual(link.props["href"], "/x")
+
+
+    def test_nodes_have_no_instance_dict(self):
+        for node in (HTMLNode("p"), LeafNode("b", "x"), ParentNode("p", [])):
+            self.assertFalse(hasattr(node, "__dict__"))
+        parent = ParentNode("p", [])
+        parent.children = [LeafNode(None, "x")]
+        self.assertEqual(parent.to_html(), "<p>x</p>")
+        with self.assertRaises(AttributeError):
+            parent.extra = True
+
+    def test_node_memory_benchmark(self):
+        results = {result["benchmark"]: result for result in bench_node_memory(1000, document_paragraphs=20)}
+        self.assertLess(results["memory_LeafNode"]["bytes_per_node"], 100)
+        self.assertLess(results["memory_LeafNode"]["bytes_per_node"], results["memory_LeafNode_dict"]["bytes_per_node"])
+        self.assertLess(results["memory_document"]["peak_traced_bytes"],
+                        results["memory_document_dict"]["peak_traced_bytes"])
+        self.assertGreater(results["memory_document"]["peak_rss_kb"], 0)
+
+
+class TestHTMLSerializationScaling(unittest.TestCase):
+    def test_synthetic_document_output(self):
+        html = synthetic_document(2).to_html()
+        self.assertEqual(
+            html,
+            '<div><ul><li>Item 0 with <b>bold</b> and a <a href="/items/0">link</a></li>'
+            '<li>Item 1 with <b>bold</b> and a <a href="/items/1">link</a></li></ul></div>',
+        )
+
+    def test_to_html_scales_linearly(self):
+        small, large = bench_to_html([2000, 32000])
+        # Quadratic string building would make each item ~16x slower on the larger document
+        self.assertLess(large["per_item"], small["per_item"] * 4)
+
    
 
     
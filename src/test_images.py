@@ -0,0 +1,139 @@
+import json
+import os
+import unittest
+from unittest import mock
+
+import images
+from assets import sync_static
+from fixtures import TEMPLATE, SiteBuildTestCase
+from images import (METADATA_FILENAME, add_image_props, build_images, cache_key, settings_key, variant_name)
+from manifest import BuildManifest, hash_file
+from template import Template
+from generate import url_rewriter
+
+IMAGE = {"width": 1200, "height": 600, "srcset": [["/images/cat.k.480w.png", 480], ["/images/cat.k.960w.png", 960]],
+         "sizes": "(max-width: 1200px) 100vw, 1200px", "settings": "s", "original": True}
+
+
+class TestImageProps(unittest.TestCase):
+    def test_add_image_props(self):
+        props = add_image_props({"src": "/b/images/cat.png", "alt": "cat"}, "/b/images/cat.png", IMAGE, "/b/")
+        self.assertEqual(props, {
+            "src": "/b/images/cat.png", "alt": "cat", "width": "1200", "height": "600",
+            "srcset": "/b/images/cat.k.480w.png 480w, /b/images/cat.k.960w.png 960w, /b/images/cat.png 1200w",
+            "sizes": "(max-width: 1200px) 100vw, 1200px",
+        })
+
+    def test_small_image_only_gets_its_size(self):
+        image = dict(IMAGE, srcset=[])
+        self.assertEqual(add_image_props({"src": "/x.png"}, "/x.png", image, "/"),
+                         {"src": "/x.png", "width": "1200", "height": "600"})
+
+    def test_rewriter_uses_the_original_src_for_lookup(self):
+        template = Template(TEMPLATE, "/b/", {"/images/cat.png": "/images/cat.f00.png"}, {"/images/cat.png": IMAGE})
+        props = url_rewriter(template)("img", {"src": "/images/cat.png", "alt": ""})
+        self.assertEqual(props["src"], "/b/images/cat.f00.png")
+        self.assertTrue(props["srcset"].endswith("/b/images/cat.f00.png 1200w"))
+        self.assertEqual(url_rewriter(template)("a", {"href": "/images/cat.png"}), {"href": "/b/images/cat.f00.png"})
+
+    def test_cache_key(self):
+        self.assertNotEqual(cache_key("abc", settings_key([480], False)), cache_key("abc", settings_key([480], True)))
+        self.assertEqual(settings_key([960, 480], False), settings_key([480, 960], False))
+
+
+class TestBuildImages(SiteBuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = os.path.join(self.root, "cache")
+        self.write("content/index.md", "# Home\n\n![a cat](/images/cat.png)")
+        self.write("content/about/index.md", "# About")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.cat = os.path.join(self.static, "images", "cat.png")
+        if images.Image is not None:
+            images.Image.new("RGB", (1200, 600), "orange").save(self.cat)
+        else:
+            self.write("static/images/cat.png", "not really a png")
+
+    def run_stage(self, enabled=True, widths=(480, 960), webp=False, jobs=1):
+        sync_static(self.static, self.docs, self.manifest)
+        return build_images(self.static, self.docs, self.cache, self.manifest, enabled, list(widths), webp, jobs)
+
+    def key(self, widths=(480, 960), webp=False):
+        return cache_key(hash_file(self.cat), settings_key(list(widths), webp))
+
+    def fake_cache_entry(self, widths=(480, 960)):
+        # What render_variants leaves behind, for running without Pillow
+        key = self.key(widths)
+        directory = os.path.join(self.cache, key[:2], key)
+        os.makedirs(directory)
+        for width in widths:
+            with open(os.path.join(directory, f"{width}w.png"), "w") as file:
+                file.write(f"{width} wide")
+        with open(os.path.join(directory, METADATA_FILENAME), "w") as file:
+            json.dump({"width": 1200, "height": 600, "variants": [[width, width // 2, ".png"] for width in widths]}, file)
+        return key
+
+    def test_cached_variants_are_copied_without_resizing(self):
+        key = self.fake_cache_entry()
+        with mock.patch.object(images, "render_variants", side_effect=AssertionError("resized")):
+            table, result = self.run_stage()
+        self.assertEqual(result.cached, [os.path.join("images", "cat.png")])
+        self.assertEqual(self.read(variant_name(os.path.join("images", "cat.png"), key, 480, ".png")), "480 wide")
+        self.assertEqual(table["/images/cat.png"]["srcset"][0], [f"/images/cat.{key[:10]}.480w.png", 480])
+
+        _, result = self.run_stage()
+        self.assertEqual(result.unchanged, [os.path.join("images", "cat.png")])
+
+    def test_pages_get_the_props(self):
+        key = self.fake_cache_entry()
+        table, _ = self.run_stage()
+        self.build(images=table)
+        page = self.read("index.html")
+        self.assertIn(f'<img src="/images/cat.png" alt="a cat" width="1200" height="600" '
+                      f'srcset="/images/cat.{key[:10]}.480w.png 480w, /images/cat.{key[:10]}.960w.png 960w, '
+                      f'/images/cat.png 1200w" sizes="(max-width: 1200px) 100vw, 1200px">', page)
+
+    def test_turning_it_off_rebuilds_pages_and_removes_variants(self):
+        self.fake_cache_entry()
+        table, _ = self.run_stage()
+        self.build(images=table)
+        table, result = self.run_stage(enabled=False)
+        self.assertEqual(len(result.removed), 2)
+        self.assertEqual(self.manifest.images, {})
+        results = self.build(images=table)
+        self.assertTrue(all(not result.skipped for result in results))
+
+    def test_missing_pillow_is_reported(self):
+        with mock.patch.object(images, "Image", None):
+            table, result = self.run_stage()
+        self.assertEqual(table, {})
+        self.assertEqual([relative_path for relative_path, _ in result.failed], [os.path.join("images", "cat.png")])
+        self.assertEqual(self.manifest.images, {})
+
+    @unittest.skipUnless(images.Image, "needs Pillow")
+    def test_resizes_once(self):
+        table, result = self.run_stage(widths=(480, 960, 2000))
+        self.assertEqual(result.generated, [os.path.join("images", "cat.png")])
+        self.assertEqual([width for _, width in table["/images/cat.png"]["srcset"]], [480, 960])
+        variant = os.path.join(self.docs, variant_name(os.path.join("images", "cat.png"),
+                                                       self.key((480, 960, 2000)), 480, ".png"))
+        with images.Image.open(variant) as image:
+            self.assertEqual(image.size, (480, 240))
+
+        # A fresh manifest, as in a clean build, still finds the resized files in the cache
+        self.manifest = BuildManifest(self.manifest.path)
+        _, result = self.run_stage(widths=(480, 960, 2000))
+        self.assertEqual((result.generated, result.cached), ([], [os.path.join("images", "cat.png")]))
+
+    @unittest.skipUnless(images.Image, "needs Pillow")
+    def test_webp_in_a_pool(self):
+        images.Image.new("RGB", (800, 800), "blue").save(os.path.join(self.static, "images", "dog.jpg"))
+        table, result = self.run_stage(webp=True, jobs=2)
+        self.assertEqual(len(result.generated), 2)
+        self.assertEqual(table["/images/dog.jpg"]["srcset"][-1][1], 800)
+        self.assertTrue(all(url.endswith(".webp") for url, _ in table["/images/cat.png"]["srcset"]))
+        self.assertFalse(table["/images/cat.png"]["original"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
+import random
 import unittest
 
+from benchmarks import bench_plain_text, bench_text_to_textnodes, chained_text_to_textnodes
 from textnode import TextNode, TextType, text_node_to_html_node
 from inline_markdown import *
 
@@ -587,5 +589,37 @@ class TestMarkdownTextToTextNode(unittest.TestCase):
             ]
         self.assertEqual(new_nodes, expected)
 
+    def test_text_to_textnodes_matches_chained_splits(self):
+        rng = random.Random(7)
+        pieces = ["*", "**", "_", "`", "[", "]", "(", ")", "!", "a", " ", "![x](y)", "[l](/u_v)"]
+        for _ in range(5000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+            self.assertEqual(text_to_textnodes(text), chained_text_to_textnodes(text), text)
+
+    def test_text_to_textnodes_single_pass_benchmark(self):
+        chained, single_pass = bench_text_to_textnodes(300, repeat=1)
+        self.assertEqual(chained["benchmark"], "inline_chained")
+        self.assertEqual(single_pass["benchmark"], "inline_single_pass")
+        self.assertGreater(single_pass["seconds"], 0)
+
+    def test_text_to_textnodes_plain_fast_path(self):
+        for text in ("", "Plain prose, with * a lone star and [brackets] (parens).", "a_b"):
+            self.assertEqual(text_to_textnodes(text), lex_inline(text), text)
+        self.assertEqual(text_to_textnodes("Just words"), [TextNode("Just words", TextType.TEXT)])
+
+    def test_split_nodes_delimiter_without_delimiter_keeps_node(self):
+        node = TextNode("no markup here", TextType.TEXT)
+        self.assertIs(split_nodes_delimiter([node], "**", TextType.BOLD)[0], node)
+
+    def test_extract_without_links(self):
+        self.assertEqual(extract_markdown_links("[not a link] (really)"), [])
+        self.assertEqual(extract_markdown_images("plain"), [])
+
+    def test_plain_text_benchmark(self):
+        names = [result["benchmark"] for result in bench_plain_text(100, repeat=1)]
+        self.assertEqual(names, ["inline_plain_lexer", "inline_plain_fast_path",
+                                 "extract_links_raw_pattern", "extract_links_precompiled",
+                                 "extract_links_shortcut"])
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,95 @@
+import os
+import unittest
+
+from assets import sync_static
+from build_engine import build_pages, collect_pages
+from fixtures import SiteBuildTestCase
+from generate import parse_page
+from linkcheck import BrokenLink, PathIndex, check_links, resolve_link
+
+
+class TestPageLinks(unittest.TestCase):
+    def links(self, lines):
+        metadata, _ = parse_page(lines)
+        return metadata["links"]
+
+    def test_line_numbers(self):
+        lines = ["# Title", "", "![cat](/cat.png) and [home](/)", "", "[post](/blog/post)"]
+        self.assertEqual(self.links(lines), [(3, "/cat.png"), (3, "/"), (5, "/blog/post")])
+
+    def test_skips_code(self):
+        lines = ["# Title", "```", "[not](/a/link)", "```", "`[inline](/code)` [real](/link)"]
+        self.assertEqual(self.links(lines), [(5, "/link")])
+
+    def test_wrapped_label(self):
+        lines = ["# Title", "", "a [long", "label](/nope) and", "![x](/x.png)"]
+        self.assertEqual(self.links(lines), [(4, "/nope"), (5, "/x.png")])
+
+    def test_front_matter_counts_towards_line_numbers(self):
+        lines = ["---", "title: T", "---", "", "[home](/)"]
+        self.assertEqual(self.links(lines), [(5, "/")])
+
+
+class TestResolveLink(unittest.TestCase):
+    def test_external_links_are_ignored(self):
+        for url in ("https://boot.dev", "//cdn.example/x.js", "#top", "mailto:a@b.c"):
+            self.assertIsNone(resolve_link(url, "index.html"))
+
+    def test_root_relative(self):
+        self.assertEqual(resolve_link("/blog/post?x=1#top", "index.html"), "blog/post")
+        self.assertEqual(resolve_link("/", "blog/index.html"), "")
+
+    def test_relative(self):
+        self.assertEqual(resolve_link("../tom", "blog/post/index.html"), "blog/tom")
+        self.assertEqual(resolve_link("images/a%20b.png", "blog/index.html"), "blog/images/a b.png")
+
+
+class TestPathIndex(unittest.TestCase):
+    def test_page_urls(self):
+        index = PathIndex()
+        index.add_page(os.path.join("blog", "post", "index.html"))
+        index.add_page("about.html")
+        index.add_file("index.css")
+        for path in ("", "blog/post", "blog/post/", "blog/post/index.html", "about", "about.html", "index.css"):
+            self.assertIn(path, index)
+        self.assertNotIn("blog", index)
+        self.assertNotIn("about/", index.paths)
+
+
+class TestCheckLinks(SiteBuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("content/index.md", "# Home\n\n[Post](/blog/post)\n\n![cat](/images/cat.png)")
+        self.write("content/blog/post/index.md", "# Post\n\n[Home](/) [Missing](/blog/gone)\n\n![dog](dog.png)")
+        self.write("static/images/cat.png", "cat")
+
+    def build(self):
+        sync_static(self.static, self.docs, self.manifest)
+        super().build("/base/")
+        return check_links(self.index, self.manifest.assets, self.docs)
+
+    def test_reports_source_and_line(self):
+        post = os.path.join(self.content, "blog", "post", "index.md")
+        self.assertEqual(self.build(), [BrokenLink(post, 3, "/blog/gone"), BrokenLink(post, 5, "dog.png")])
+        self.assertEqual(str(self.build()[0]), f"{post}:3: broken link /blog/gone")
+
+    def test_unchanged_pages_are_still_checked(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+        self.manifest.seen = set()
+        pages = collect_pages(self.content, self.docs)
+        results = build_pages(pages, self.template, "/base/", manifest=self.manifest, index=self.index)
+        self.assertTrue(all(result.skipped for result in results))
+        self.manifest.remove_stale(self.docs)
+        self.index.retain(source for source, _ in pages)
+        self.assertEqual(check_links(self.index, self.manifest.assets, self.docs),
+                         [BrokenLink(os.path.join(self.content, "index.md"), 3, "/blog/post")])
+
+    def test_missing_asset(self):
+        os.remove(os.path.join(self.static, "images", "cat.png"))
+        broken = [link.url for link in self.build()]
+        self.assertIn("/images/cat.png", broken)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import unittest
+
+from fixtures import SiteBuildTestCase
+from linkcheck import check_links
+from listings import build_listings, listing_path, slugify
+
+
+class TestHelpers(unittest.TestCase):
+    def test_slugify(self):
+        self.assertEqual(slugify("Middle Earth & Co."), "middle-earth-co")
+        self.assertEqual(slugify("???"), "-")
+
+    def test_listing_path(self):
+        self.assertEqual(listing_path("blog", 1), os.path.join("blog", "index.html"))
+        self.assertEqual(listing_path("blog", 2), os.path.join("blog", "page", "2", "index.html"))
+        self.assertEqual(listing_path("blog", 1, first_at_root=False), os.path.join("blog", "page", "1", "index.html"))
+
+
+class TestBuildListings(SiteBuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("content/index.md", "# Home\n\n[Blog](/blog/)")
+        self.post("one", "2024-01-01", "elves")
+        self.post("two", "2024-01-02", "elves, rings")
+        self.post("three", "2024-01-03", "rings")
+
+    def post(self, name, date, tags):
+        return self.write(f"content/blog/{name}/index.md",
+                          f"---\ndate: {date}\ntags: [{tags}]\n---\n# Post {name}\n\nAbout {name}.")
+
+    def build(self, minify=False):
+        results = super().build("/base/", minify=minify)
+        self.index.retain(result.source for result in results)
+        return build_listings(self.index, self.manifest, self.template, self.content, self.docs, "/base/",
+                              ["blog"], page_size=2, minify=minify)
+
+    def output(self, *parts):
+        return os.path.join(self.docs, *parts, "index.html")
+
+    def test_pages(self):
+        result = self.build()
+        self.assertEqual(sorted(result.written), sorted([
+            self.output("blog"), self.output("blog", "page", "2"),
+            self.output("blog", "tags", "elves"), self.output("blog", "tags", "rings"),
+            self.output("blog", "tags"), self.output("blog", "archive"),
+        ]))
+
+        first = self.read("blog", "index.html")
+        self.assertIn("<title>Blog</title>", first)
+        self.assertLess(first.index("Post three"), first.index("Post two"))
+        self.assertNotIn("Post one", first)
+        self.assertIn('<a href="/base/blog/three/">Post three</a> <time datetime="2024-01-03">2024-01-03</time>', first)
+        self.assertIn('<a href="/base/blog/tags/rings/" rel="tag">rings</a>', first)
+        self.assertIn("<p>About three.</p>", first)
+        self.assertIn('<span>Page 1 of 2</span> <a href="/base/blog/page/2/" rel="next">Older</a>', first)
+        self.assertIn('<a href="/base/blog/" rel="prev">Newer</a>', self.read("blog", "page", "2", "index.html"))
+
+        self.assertIn("<h2>2024</h2>", self.read("blog", "archive", "index.html"))
+        self.assertIn("(2)", self.read("blog", "tags", "index.html"))
+        self.assertNotIn("Post three", self.read("blog", "tags", "elves", "index.html"))
+
+    def test_unchanged_listings_are_not_rewritten(self):
+        self.build()
+        result = self.build()
+        self.assertEqual(result.written, [])
+        self.assertEqual(len(result.unchanged), 6)
+
+    def test_turning_minify_off_rewrites_listings(self):
+        self.build(minify=True)
+        self.assertEqual(len(self.build().written), 6)
+
+    def test_only_changed_slices_are_rewritten(self):
+        self.build()
+        self.post("zero", "2023-12-31", "elves")
+        result = self.build()
+        # The oldest post only lands on the last page, the newest page keeps its slice. The elves
+        # tag page gains a second page, so its first page changes for the pagination links
+        self.assertEqual(sorted(result.written), sorted([
+            self.output("blog", "page", "2"), self.output("blog", "tags", "elves"),
+            self.output("blog", "tags", "elves", "page", "2"),
+            self.output("blog", "tags"), self.output("blog", "archive"),
+        ]))
+        self.assertIn("<h2>2023</h2>", self.read("blog", "archive", "index.html"))
+
+    def test_listings_no_longer_generated_are_removed(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "three", "index.md"))
+        result = self.build()
+        self.assertEqual(result.removed, [self.output("blog", "page", "2")])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog", "page")))
+        self.assertEqual(set(self.manifest.listings), {self.output("blog"), self.output("blog", "tags"),
+                                                       self.output("blog", "tags", "elves"),
+                                                       self.output("blog", "tags", "rings"),
+                                                       self.output("blog", "archive")})
+
+    def test_content_page_keeps_its_output(self):
+        self.write("content/blog/index.md", "# Hand written blog index")
+        self.build()
+        self.assertIn("Hand written blog index", self.read("blog", "index.html"))
+        self.assertIn("Post three", self.read("blog", "page", "1", "index.html"))
+        self.assertNotIn("Hand written", self.read("blog", "page", "1", "index.html"))
+
+    def test_tags_with_the_same_slug_share_a_listing(self):
+        self.post("four", "2024-01-04", "Rings, rings!")
+        self.build()
+        page = self.read("blog", "tags", "rings", "index.html")
+        self.assertIn("<title>Blog: Rings, rings, rings!</title>", page)
+        self.assertEqual(page.count("Post four</a>"), 1)
+        self.assertIn("Post two", self.read("blog", "tags", "rings", "page", "2", "index.html"))
+        self.assertIn('rel="tag">Rings, rings, rings!</a> (3)', self.read("blog", "tags", "index.html"))
+
+    def test_listings_can_be_linked_to(self):
+        self.build()
+        self.assertEqual(check_links(self.index, self.manifest.assets, self.docs, self.manifest.listings), [])
+        self.assertNotEqual(check_links(self.index, self.manifest.assets, self.docs), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
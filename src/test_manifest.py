@@ -0,0 +1,74 @@
+import os
+import unittest
+
+from fixtures import SiteTestCase
+from manifest import BuildManifest, hash_file, prune_empty_dirs
+
+
+class TestBuildManifest(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manifest_path = os.path.join(self.root, "cache", "manifest.json")
+
+    def test_hash_file_changes_with_contents(self):
+        path = self.write("a.md", "# Title")
+        first = hash_file(path)
+        self.write("a.md", "# Other Title")
+        self.assertNotEqual(first, hash_file(path))
+
+    def test_missing_manifest_is_empty(self):
+        manifest = BuildManifest.load(self.manifest_path)
+        self.assertEqual(manifest.pages, {})
+
+    def test_record_and_reload_stale_reasons(self):
+        output = self.write("docs/a.html", "<p></p>")
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.record("a.md", "src1", "tpl1", output, "/")
+        manifest.save()
+
+        reloaded = BuildManifest.load(self.manifest_path)
+        self.assertEqual(reloaded.stale_reasons("a.md", "src1", "tpl1", output, "/"), [])
+        self.assertEqual(reloaded.stale_reasons("a.md", "src2", "tpl1", output, "/"), ["source changed"])
+        self.assertEqual(reloaded.stale_reasons("a.md", "src1", "tpl2", output, "/"), ["template changed"])
+        self.assertEqual(reloaded.stale_reasons("a.md", "src1", "tpl1", output, "/base/"), ["base path changed"])
+
+    def test_missing_output_is_not_fresh(self):
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record("a.md", "src1", "tpl1", os.path.join(self.root, "gone.html"), "/")
+        self.assertEqual(manifest.stale_reasons("a.md", "src1", "tpl1", os.path.join(self.root, "gone.html"), "/"),
+                         ["output missing"])
+
+    def test_corrupt_manifest_is_empty(self):
+        self.write("cache/manifest.json", "{not json")
+        manifest = BuildManifest.load(self.manifest_path)
+        self.assertEqual(manifest.pages, {})
+
+    def test_remove_stale_deletes_unseen_outputs(self):
+        docs = os.path.join(self.root, "docs")
+        kept = self.write("docs/index.html", "kept")
+        removed = self.write("docs/blog/old/index.html", "removed")
+
+        manifest = BuildManifest(self.manifest_path)
+        manifest.record("index.md", "a", "t", kept, "/")
+        manifest.record("blog/old/index.md", "b", "t", removed, "/")
+        manifest.save()
+
+        manifest = BuildManifest.load(self.manifest_path)
+        manifest.stale_reasons("index.md", "a", "t", kept, "/")
+
+        self.assertEqual(manifest.remove_stale(docs), [removed])
+        self.assertTrue(os.path.exists(kept))
+        self.assertFalse(os.path.exists(removed))
+        self.assertFalse(os.path.exists(os.path.join(docs, "blog")))
+        self.assertEqual(list(manifest.pages), ["index.md"])
+
+    def test_prune_empty_dirs_stops_at_root(self):
+        docs = os.path.join(self.root, "docs")
+        os.makedirs(os.path.join(docs, "a", "b"))
+        prune_empty_dirs(os.path.join(docs, "a", "b"), docs)
+        self.assertTrue(os.path.exists(docs))
+        self.assertFalse(os.path.exists(os.path.join(docs, "a")))
+
+
+if __name__ == "__main__":
+    unittest.main()
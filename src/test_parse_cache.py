@@ -0,0 +1,105 @@
+import contextlib
+import os
+import time
+import unittest
+from unittest import mock
+
+import generate
+from build_engine import summarize
+from fixtures import TEMPLATE, SiteBuildTestCase, SiteTestCase
+from parse_cache import ParseCache
+from template import Template
+
+
+class TestParseCache(SiteTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = ParseCache(os.path.join(self.root, "parse"))
+
+    def test_round_trip(self):
+        key = self.cache.key("abc", "/")
+        self.assertIsNone(self.cache.get(key))
+        metadata = {"title": "Title", "summary": "Summary", "words": 2, "front_matter": {"tags": ["a"]}}
+        self.cache.put(key, metadata, "<div><p>body\nlines</p></div>")
+        self.assertEqual(self.cache.get(key), (metadata, "<div><p>body\nlines</p></div>"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_key_depends_on_base_path(self):
+        self.assertNotEqual(self.cache.key("abc", "/"), self.cache.key("abc", "/base/"))
+
+    def test_trim_evicts_least_recently_used(self):
+        keys = [self.cache.key(str(i), "/") for i in range(3)]
+        for index, key in enumerate(keys):
+            self.cache.put(key, {}, "x" * 100)
+            past = time.time() - 100 + index
+            os.utime(self.cache.entry_path(key), (past, past))
+        self.cache.get(keys[0])
+
+        self.cache.max_bytes = 250
+        self.assertEqual(self.cache.trim(), 1)
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.assertIsNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_clear(self):
+        key = self.cache.key("abc", "/")
+        self.cache.put(key, {"title": "Title"}, "<p>body</p>")
+        self.cache.clear()
+        self.assertIsNone(self.cache.get(key))
+
+
+class TestBuildWithParseCache(SiteBuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("content/index.md", "# Home\n\n[Post](/blog/post)")
+        self.write("content/blog/post/index.md", "# Post\n\nSome **bold** text")
+        self.cache = ParseCache(os.path.join(self.root, "parse"))
+
+    def build(self, jobs=1, base_path="/", manifest=None):
+        return summarize(super().build(base_path, jobs=jobs, manifest=manifest, parse_cache=self.cache))
+
+    def test_template_change_reuses_parsed_bodies(self):
+        summary = self.build(manifest=self.manifest)
+        self.assertEqual((summary["parse_cache_hits"], summary["parse_cache_misses"]), (0, 2))
+
+        self.write("template.html", "<main>{{ Content }}</main>")
+        summary = self.build(manifest=self.manifest)
+        self.assertEqual((summary["built"], summary["parse_cache_hits"], summary["parse_cache_misses"]), (2, 2, 0))
+        self.assertEqual(self.read("index.html"), '<main><div><h1>Home</h1><p><a href="/blog/post">Post</a></p></div></main>')
+
+    def test_cached_pages_match_fresh_pages(self):
+        for jobs in (1, 2):
+            self.build(jobs, "/base/")
+            cached = self.read(os.path.join("blog", "post", "index.html"))
+            self.assertEqual(cached, "<html><title>Post</title><body><div><h1>Post</h1>"
+                                     "<p>Some <b>bold</b> text</p></div></body></html>")
+            self.assertIn('href="/base/blog/post"', self.read("index.html"))
+
+    def test_changed_source_misses(self):
+        self.build()
+        self.write("content/index.md", "# Home changed")
+        summary = self.build()
+        self.assertEqual((summary["parse_cache_hits"], summary["parse_cache_misses"]), (1, 1))
+        self.assertIn("<h1>Home changed</h1>", self.read("index.html"))
+
+    def test_misses_and_hits_stream_into_the_file(self):
+        # Neither path joins the page into one string before writing it
+        source = os.path.join(self.content, "blog", "post", "index.md")
+        key = self.cache.key("post", "/")
+        for expected in ((0, 1), (1, 1)):
+            writes = []
+
+            @contextlib.contextmanager
+            def recording_open(path):
+                yield mock.Mock(write=writes.append)
+
+            with mock.patch.object(generate, "atomic_open", recording_open):
+                generate.generate_page(source, Template(TEMPLATE), "index.html", self.cache, key)
+            self.assertEqual((self.cache.hits, self.cache.misses), expected)
+            self.assertGreater(len(writes), 1)
+            self.assertEqual("".join(writes), "<html><title>Post</title><body><div><h1>Post</h1>"
+                                              "<p>Some <b>bold</b> text</p></div></body></html>")
+
+
+if __name__ == "__main__":
+    unittest.main()
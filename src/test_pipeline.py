@@ -0,0 +1,84 @@
+import os
+import threading
+import unittest
+from unittest import mock
+
+import build_engine
+from fixtures import SiteBuildTestCase, SiteTestCase
+from pipeline import BackgroundWriter, prefetch
+
+
+class TestPrefetch(unittest.TestCase):
+    def test_yields_in_order(self):
+        self.assertEqual([(item, data) for item, data, _ in prefetch(range(50), lambda item: item * 2)],
+                         [(item, item * 2) for item in range(50)])
+
+    def test_read_errors_are_reported_per_item(self):
+        def read(item):
+            if item == 1:
+                raise OSError("unreadable")
+            return item
+
+        jobs = list(prefetch([0, 1, 2], read))
+        self.assertEqual([error is None for _, _, error in jobs], [True, False, True])
+        self.assertIn("unreadable", jobs[1][2])
+
+    def test_reader_stays_bounded(self):
+        read = []
+        items = prefetch(range(100), lambda item: read.append(item) or item, depth=4)
+        next(items)
+        threading.Event().wait(0.05)
+        # One item handed out, depth items queued and one more blocked on put
+        self.assertLessEqual(len(read), 6)
+        items.close()
+
+    def test_early_stop_does_not_hang(self):
+        for item, _, _ in prefetch(range(1000), lambda item: item, depth=2):
+            if item == 3:
+                break
+
+
+class TestBackgroundWriter(SiteTestCase):
+    def test_writes_pages_and_collects_errors(self):
+        blocker = os.path.join(self.root, "file")
+        with open(blocker, "w") as file:
+            file.write("")
+        with BackgroundWriter(backlog=1) as writer:
+            writer.write("a", os.path.join(self.root, "a", "index.html"), ["<p>", "a", "</p>"])
+            writer.write("b", os.path.join(blocker, "index.html"), ["b"])
+        with open(os.path.join(self.root, "a", "index.html")) as file:
+            self.assertEqual(file.read(), "<p>a</p>")
+        self.assertEqual(list(writer.errors), ["b"])
+
+
+class TestPipelinedBuild(SiteBuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("content/index.md", "# Home\n\n[Post](/blog/post)")
+        self.write("content/blog/post/index.md", "# Post\n\nSome **bold** text")
+        self.write("content/broken/index.md", "No title")
+
+    def test_pipelined_build(self):
+        results = self.build("/base/", pipeline=True)
+        self.assertEqual([result.ok for result in results], [True, False, True])
+        self.assertEqual(results[2].links, [(3, "/blog/post")])
+        self.assertEqual(self.read("index.html"), '<html><title>Home</title><body><div><h1>Home</h1>'
+                                                  '<p><a href="/base/blog/post">Post</a></p></div></body></html>')
+
+    def test_write_failures_fail_the_page(self):
+        self.write("docs/blog/post/index.html/keep", "a directory where the page should go")
+        # Results reach on_result only once their write is over, failures included
+        seen = []
+        results = self.build(on_result=lambda result: seen.append(result.ok), pipeline=True)
+        failed = [os.path.relpath(result.output, self.docs) for result in results if not result.ok]
+        self.assertEqual(failed, [os.path.join("blog", "post", "index.html"), os.path.join("broken", "index.html")])
+        self.assertEqual(seen, [False, False, True])
+
+    def test_serial_build_is_not_pipelined_by_default(self):
+        with mock.patch.object(build_engine, "render_pipelined", side_effect=AssertionError("pipelined")):
+            results = self.build()
+        self.assertEqual([result.ok for result in results], [True, False, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import gzip
+import os
+import unittest
+from unittest import mock
+
+import postprocess
+from assets import sync_static
+from fixtures import SiteBuildTestCase
+from postprocess import minify_css, minify_html
+
+PAGE = """<!doctype html>
+<html>
+  <head>
+    <!-- generated -->
+    <title>Home</title>
+  </head>
+  <body>
+    <article><div><p>Some <b>bold</b>   and
+    <i>italic</i> text</p><pre><code>keep   this
+  indented</code></pre></div></article>
+  </body>
+</html>
+"""
+
+
+class TestMinify(unittest.TestCase):
+    def test_html(self):
+        self.assertEqual(minify_html(PAGE),
+                         "<!doctype html><html><head><title>Home</title></head><body><article><div>"
+                         "<p>Some <b>bold</b> and\n<i>italic</i> text</p>"
+                         "<pre><code>keep   this\n  indented</code></pre></div></article></body></html>")
+
+    def test_html_keeps_script_and_conditional_comments(self):
+        html = "<script>\n  let a  =  1;\n</script> <!--[if IE]>x<![endif]-->"
+        self.assertEqual(minify_html(html), html)
+
+    def test_css(self):
+        css = "/* theme */\nbody {\n  color: red;\n  font-family: \"A  B\", serif;\n}\na :hover > b { width: calc(1px + 2px); }\n"
+        self.assertEqual(minify_css(css),
+                         'body{color: red;font-family: "A  B",serif}a :hover>b{width: calc(1px + 2px)}')
+
+
+class TestPostprocess(SiteBuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("static/index.css", "body {\n  color: red;\n}\n" + "p { margin: 0; }\n" * 40)
+        self.write("docs/index.html", PAGE * 4)
+        self.write("docs/small.html", "<p>  hi  </p>")
+        self.write("docs/cat.png", "not text")
+
+    def run_stage(self, minify=True, compress=True, jobs=1):
+        sync_static(self.static, self.docs, self.manifest)
+        return postprocess.postprocess(self.docs, self.manifest, minify, compress, jobs)
+
+    def test_minifies_and_compresses(self):
+        result = self.run_stage()
+        self.assertEqual(sorted(result.processed), ["index.css", "index.html", "small.html"])
+        self.assertTrue(self.read("index.css").startswith("body{color: red}p{margin: 0}"))
+        self.assertEqual(self.read("small.html"), "<p>hi</p>")
+        self.assertEqual(gzip.decompress(self.read("index.html.gz", mode="rb")).decode(), self.read("index.html"))
+        # Too small to be worth compressing, and not a text type
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "small.html.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "cat.png.gz")))
+        self.assertGreater(result.bytes_before, result.bytes_after)
+
+    def test_unchanged_files_are_skipped(self):
+        self.run_stage()
+        result = self.run_stage()
+        self.assertEqual(result.processed, [])
+        self.assertEqual(len(result.skipped), 3)
+
+        self.write("docs/index.html", PAGE)
+        result = self.run_stage()
+        self.assertEqual(result.processed, ["index.html"])
+
+    def test_minified_assets_are_not_copied_again(self):
+        self.run_stage()
+        self.assertEqual(sync_static(self.static, self.docs, self.manifest).copied, [])
+
+    def test_changed_options_reprocess(self):
+        self.run_stage(minify=False)
+        self.assertIn("<!-- generated -->", self.read("index.html"))
+        self.run_stage()
+        self.assertNotIn("<!-- generated -->", self.read("index.html"))
+
+    def test_stale_siblings_are_removed(self):
+        self.run_stage()
+        os.remove(os.path.join(self.docs, "index.html"))
+        result = self.run_stage()
+        self.assertEqual(result.removed, ["index.html.gz"])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "index.html.gz")))
+
+        result = self.run_stage(minify=False, compress=False)
+        self.assertEqual(result.removed, ["index.css.gz"])
+        self.assertEqual(self.manifest.processed, {})
+
+    def test_paths_limit_the_pass(self):
+        self.run_stage()
+        recorded = self.manifest.processed["index.css"]
+        self.write("docs/index.html", PAGE * 4)
+        os.remove(os.path.join(self.docs, "small.html"))
+        result = postprocess.postprocess(self.docs, self.manifest, paths=["index.html", "small.html"])
+        self.assertEqual((result.processed, result.skipped), (["index.html"], []))
+        self.assertNotIn("<!-- generated -->", self.read("index.html"))
+        self.assertEqual(self.manifest.processed["index.css"], recorded)
+        self.assertNotIn("small.html", self.manifest.processed)
+
+    def test_pool(self):
+        for number in range(postprocess.POOL_THRESHOLD):
+            self.write(f"docs/page{number}.html", PAGE * 4)
+        result = self.run_stage(jobs=2)
+        self.assertEqual(len(result.processed), postprocess.POOL_THRESHOLD + 3)
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "page0.html.gz")))
+
+    def test_brotli_when_available(self):
+        fake_brotli = mock.Mock()
+        fake_brotli.compress.side_effect = lambda data: data[:10]
+        with mock.patch.object(postprocess, "brotli", fake_brotli):
+            self.run_stage()
+        self.assertEqual(self.read("index.html.br", mode="rb"), self.read("index.html", mode="rb")[:10])
+
+
+if __name__ == "__main__":
+    unittest.main()
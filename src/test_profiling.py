@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import profiling
+from build_engine import build_pages, collect_pages
+from profiling import BuildProfiler, install_profiler, stage
+
+
+class TestBuildProfiler(unittest.TestCase):
+    def tearDown(self):
+        install_profiler(None)
+
+    def test_stage_is_noop_without_profiler(self):
+        install_profiler(None)
+        self.assertIs(stage("inline parsing"), profiling.NULL_STAGE)
+
+    def test_nested_stages_are_exclusive(self):
+        profiler = BuildProfiler()
+        with profiler.page("a.md"):
+            with profiler.stage("block parsing"):
+                time.sleep(0.02)
+                with profiler.stage("inline parsing"):
+                    time.sleep(0.05)
+        block_wall = profiler.pages["a.md"]["block parsing"][0]
+        inline_wall = profiler.pages["a.md"]["inline parsing"][0]
+        self.assertGreaterEqual(inline_wall, 0.05)
+        self.assertLess(block_wall, 0.05)
+
+    def test_hooks_receive_stage_timings(self):
+        profiler = BuildProfiler()
+        calls = []
+        profiler.add_hook(lambda page, name, wall, cpu: calls.append((page, name)))
+        with profiler.stage("asset copy"):
+            pass
+        with profiler.page("a.md"):
+            with profiler.stage("write"):
+                pass
+        self.assertEqual(calls, [(None, "asset copy"), ("a.md", "write")])
+
+    def test_take_and_merge_page(self):
+        worker = BuildProfiler(trace=True)
+        with worker.page("a.md"):
+            with worker.stage("write"):
+                pass
+        timings, events = worker.take_page("a.md")
+        self.assertEqual(list(timings), ["write"])
+        self.assertEqual(worker.pages, {})
+
+        main = BuildProfiler(trace=True)
+        main.merge_page("a.md", timings, events)
+        self.assertEqual(main.slowest_pages()[0][1], "a.md")
+        self.assertEqual(main.events, events)
+
+    def test_report_and_chrome_trace(self):
+        profiler = BuildProfiler(trace=True)
+        with profiler.page("slow.md"):
+            with profiler.stage("templating"):
+                time.sleep(0.01)
+        with profiler.page("fast.md"):
+            with profiler.stage("templating"):
+                pass
+        report = profiler.report()
+        self.assertIn("templating", report)
+        self.assertLess(report.index("slow.md"), report.index("fast.md"))
+
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "trace.json")
+            profiler.write_chrome_trace(path)
+            with open(path) as file:
+                trace = json.load(file)
+        self.assertEqual([event["args"]["page"] for event in trace["traceEvents"]], ["slow.md", "fast.md"])
+        self.assertEqual(trace["traceEvents"][0]["ph"], "X")
+
+
+class TestProfiledBuild(unittest.TestCase):
+    def tearDown(self):
+        install_profiler(None)
+
+    def test_profiled_build_matches_streaming_build(self):
+        with tempfile.TemporaryDirectory() as root:
+            content = os.path.join(root, "content")
+            os.makedirs(content)
+            with open(os.path.join(content, "index.md"), "w") as file:
+                file.write("# Title\n\nSome **bold** [link](/x)\n\n- a\n- b")
+            template = os.path.join(root, "template.html")
+            with open(template, "w") as file:
+                file.write('<title>{{ Title }}</title><link href="/index.css">{{ Content }}')
+
+            outputs = []
+            for profiled in (False, True):
+                profiler = install_profiler(BuildProfiler() if profiled else None)
+                docs = os.path.join(root, f"docs{profiled}")
+                build_pages(collect_pages(content, docs), template, "/base/")
+                with open(os.path.join(docs, "index.html")) as file:
+                    outputs.append(file.read())
+
+            self.assertEqual(outputs[0], outputs[1])
+            page = profiler.pages[os.path.join(content, "index.md")]
+            for name in ("file read", "block parsing", "inline parsing", "html serialization", "templating", "write"):
+                self.assertIn(name, page)
+
+
+if __name__ == "__main__":
+    unittest.main()
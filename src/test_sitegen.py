@@ -0,0 +1,67 @@
+import os
+import random
+import unittest
+
+from benchmarks import bench_site, compare_results
+from block_markdown import markdown_to_html_node
+from build_engine import collect_pages
+from fixtures import SiteTestCase
+from sitegen import SiteShape, generate_site, synthetic_page
+
+
+class TestSiteGenerator(SiteTestCase):
+    def test_generates_requested_page_count(self):
+        site = generate_site(self.root, SiteShape(pages=12, depth=2))
+        pages = collect_pages(site["content"], os.path.join(self.root, "docs"))
+        self.assertEqual(len(pages), 12)
+        self.assertTrue(os.path.exists(site["template"]))
+        self.assertTrue(os.path.exists(os.path.join(site["static"], "index.css")))
+
+    def test_pages_are_nested(self):
+        site = generate_site(self.root, SiteShape(pages=12, depth=2))
+        depths = {os.path.relpath(source, site["content"]).count(os.sep) for source, _ in
+                  collect_pages(site["content"], os.path.join(self.root, "docs"))}
+        # index.md at the root, every other page in pageN/index.md below two section directories
+        self.assertEqual(depths, {0, 3})
+
+    def test_same_seed_same_page(self):
+        shape = SiteShape(seed=7)
+        first = synthetic_page(random.Random(shape.seed), "Title", shape)
+        second = synthetic_page(random.Random(shape.seed), "Title", shape)
+        self.assertEqual(first, second)
+
+    def test_pages_parse(self):
+        shape = SiteShape(inline_density=1.0)
+        page = synthetic_page(random.Random(0), "Title", shape)
+        self.assertIn("<h1>Title</h1>", markdown_to_html_node(page).to_html())
+
+
+class TestBenchSite(unittest.TestCase):
+    def test_bench_site(self):
+        results = bench_site(SiteShape(pages=3, paragraphs=2), repeat=1)
+        self.assertEqual([result["benchmark"] for result in results], [
+            "site_markdown_to_html_node",
+            "site_text_to_textnodes",
+            "site_to_html",
+            "site_build_jobs1",
+        ])
+        self.assertTrue(all(result["seconds"] > 0 for result in results))
+
+    def test_compare_results_flags_regressions(self):
+        baseline = {"results": [
+            {"benchmark": "a", "size": 10, "seconds": 1.0},
+            {"benchmark": "b", "size": 10, "seconds": 1.0},
+            {"benchmark": "c", "size": 10, "bytes_per_node": 56.0},
+        ]}
+        results = [
+            {"benchmark": "a", "size": 10, "seconds": 1.1},
+            {"benchmark": "b", "size": 10, "seconds": 1.5},
+            {"benchmark": "d", "size": 10, "seconds": 9.0},
+        ]
+        comparisons = compare_results(results, baseline, threshold=0.15)
+        self.assertEqual([(c["benchmark"], c["regression"]) for c in comparisons],
+                         [("a", False), ("b", True)])
+
+
+if __name__ == "__main__":
+    unittest.main()
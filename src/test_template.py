@@ -0,0 +1,64 @@
+import io
+import os
+import tempfile
+import unittest
+
+from fixtures import render
+from htmlnode import LeafNode, ParentNode
+from template import Template, rewrite_base_path
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render_fills_slots(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(
+            render(template, Title="Hello", Content="<p>World</p>"),
+            "<title>Hello</title><body><p>World</p></body>",
+        )
+
+    def test_render_repeated_slot(self):
+        template = Template("{{ Title }} - {{ Title }}")
+        self.assertEqual(render(template, Title="A"), "A - A")
+
+    def test_render_keeps_unknown_slots(self):
+        template = Template("{{ Title }} {{ Footer }}")
+        self.assertEqual(render(template, Title="A"), "A {{ Footer }}")
+
+    def test_render_does_not_rescan_values(self):
+        template = Template("<body>{{ Content }}</body>", "/base/")
+        self.assertEqual(
+            render(template, Content='{{ Title }}<a href="/raw">'),
+            '<body>{{ Title }}<a href="/raw"></body>',
+        )
+
+    def test_base_path_applied_to_chrome(self):
+        template = Template('<link href="/index.css"><img src="/logo.png">{{ Content }}', "/site/")
+        self.assertEqual(
+            render(template, Content=""),
+            '<link href="/site/index.css"><img src="/site/logo.png">',
+        )
+
+    def test_rewrite_base_path_default_is_noop(self):
+        html = '<a href="/x">'
+        self.assertEqual(rewrite_base_path(html, "/"), html)
+
+    def test_write_streams_nodes_and_strings(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}{{ Footer }}")
+        output = io.StringIO()
+        node = ParentNode("div", [LeafNode("b", "bold")])
+        template.write(output.write, Title="T", Content=node)
+        self.assertEqual(output.getvalue(), "<title>T</title><div><b>bold</b></div>{{ Footer }}")
+        self.assertEqual(output.getvalue(), render(template, Title="T", Content=node.to_html()))
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            with open(path, "w") as file:
+                file.write("<h1>{{ Title }}</h1>")
+            template = Template.load(path, "/base/")
+            self.assertEqual(render(template, Title="T"), "<h1>T</h1>")
+            self.assertEqual(template.base_path, "/base/")
+
+
+if __name__ == "__main__":
+    unittest.main()
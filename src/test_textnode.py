@@ -41,6 +41,11 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode(None, TextType.TEXT)
         self.assertEqual(node1, node2)
 
+    def test_text_node_has_no_instance_dict(self):
+        node = TextNode("text", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertEqual(repr(node), "TextNode(text, text, None)")
+
 class TestTestNodeToHTML(unittest.TestCase):
     def test_text(self):
         # Test converting a TEXT TextNode to an HTMLNode
@@ -0,0 +1,125 @@
+import gzip
+import os
+import threading
+import unittest
+import urllib.request
+
+from config import SiteConfig
+from fixtures import SiteBuildTestCase
+from manifest import BuildManifest
+from watch import (DevBuilder, LiveReload, diff_snapshots, inject_live_reload, snapshot,
+                   start_dev_server, watch_changes, LIVE_RELOAD_SCRIPT)
+
+
+class TestSnapshots(unittest.TestCase):
+    def test_diff_snapshots(self):
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "b": (2, 1), "d": (1, 1)}
+        self.assertEqual(diff_snapshots(old, new), {"b", "c", "d"})
+
+    def test_watch_changes_debounces_bursts(self):
+        states = iter([
+            {"a": 1},
+            {"a": 1},
+            {"a": 2},
+            {"a": 2, "b": 1},
+            {"a": 3, "b": 1},
+            {"a": 3, "b": 1},
+        ])
+        changes = watch_changes(lambda: next(states), interval=0, debounce=0, sleep=lambda _: None)
+        self.assertEqual(next(changes), {"a", "b"})
+
+    def test_inject_live_reload(self):
+        self.assertEqual(inject_live_reload("<body>x</body>"), f"<body>x{LIVE_RELOAD_SCRIPT}</body>")
+        self.assertEqual(inject_live_reload("x"), f"x{LIVE_RELOAD_SCRIPT}")
+
+
+class TestDevBuilder(SiteBuildTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("content/index.md", "# Home")
+        self.write("content/blog/post/index.md", "# Post")
+        self.write("static/index.css", "body {}")
+        config = SiteConfig(content=self.content, static=self.static, template=self.template, output=self.docs, jobs=1)
+        self.builder = DevBuilder(config, self.manifest)
+        self.builder.rebuild({self.template, os.path.join(self.static, "index.css")})
+
+    def built(self, results):
+        return [os.path.relpath(result.output, self.docs) for result in results if not result.skipped]
+
+    def test_template_change_rebuilds_everything(self):
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "blog", "post", "index.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.docs, "index.css")))
+        self.write("template.html", "<main>{{ Content }}</main>")
+        results, _ = self.builder.rebuild({self.template})
+        self.assertEqual(self.built(results), ["blog/post/index.html", "index.html"])
+
+    def test_content_change_rebuilds_only_that_page(self):
+        path = self.write("content/index.md", "# Home again")
+        results, removed = self.builder.rebuild({path})
+        self.assertEqual(self.built(results), ["index.html"])
+        self.assertEqual(removed, [])
+
+    def test_static_change_rebuilds_pages_using_it(self):
+        self.write("content/blog/post/index.md", "# Post\n\n![logo](/logo.png)")
+        path = os.path.join(self.content, "blog", "post", "index.md")
+        self.builder.rebuild({path, self.write("static/logo.png", "logo")})
+        results, _ = self.builder.rebuild({self.write("static/logo.png", "new logo")})
+        self.assertEqual(self.built(results), ["blog/post/index.html"])
+
+    def test_removed_content_removes_output(self):
+        path = os.path.join(self.content, "blog", "post", "index.md")
+        os.remove(path)
+        results, removed = self.builder.rebuild({path})
+        self.assertEqual(results, [])
+        self.assertEqual(removed, [os.path.join(self.docs, "blog", "post", "index.html")])
+        self.assertFalse(os.path.exists(os.path.join(self.docs, "blog")))
+
+    def test_rebuilt_pages_are_postprocessed(self):
+        config = SiteConfig(content=self.content, static=self.static, template=self.template, output=self.docs,
+                            jobs=1, minify=True, compress=True)
+        builder = DevBuilder(config, BuildManifest(os.path.join(self.root, "minified.json")))
+        self.write("content/blog/post/index.md", "# Post\n\n" + "Some words. " * 40)
+        builder.rebuild({self.template, os.path.join(self.static, "index.css")})
+        post = os.path.join(self.docs, "blog", "post", "index.html")
+        self.assertTrue(os.path.exists(post + ".gz"))
+
+        path = self.write("content/index.md", "# Home again\n\n" + "Some   words. " * 40)
+        builder.rebuild({path})
+        self.assertNotIn("Some   words", self.read("index.html"))
+        self.assertEqual(gzip.decompress(self.read("index.html.gz", mode="rb")).decode(), self.read("index.html"))
+
+        source = os.path.join(self.content, "blog", "post", "index.md")
+        os.remove(source)
+        builder.rebuild({source})
+        self.assertFalse(os.path.exists(post + ".gz"))
+
+    def test_snapshot_sees_watched_files(self):
+        state = snapshot(self.builder.watched_paths())
+        self.assertIn(self.template, state)
+        self.assertIn(os.path.join(self.content, "blog", "post", "index.md"), state)
+        self.assertIn(os.path.join(self.static, "index.css"), state)
+
+    def test_dev_server_injects_live_reload(self):
+        server = start_dev_server(self.docs, 0, LiveReload())
+        try:
+            url = f"http://localhost:{server.server_address[1]}/"
+            with urllib.request.urlopen(url) as response:
+                self.assertIn(LIVE_RELOAD_SCRIPT, response.read().decode("utf-8"))
+            with urllib.request.urlopen(url + "index.css") as response:
+                self.assertEqual(response.read(), b"body {}")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestLiveReload(unittest.TestCase):
+    def test_wait_returns_new_version(self):
+        live_reload = LiveReload()
+        threading.Timer(0.01, live_reload.notify).start()
+        self.assertEqual(live_reload.wait(0, 5), 1)
+        self.assertEqual(live_reload.wait(1, 0.01), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
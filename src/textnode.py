@@ -10,7 +10,8 @@ class TextType(Enum):
         IMAGE = "image"
 
 class TextNode:
-        
+        __slots__ = ("text", "texttype", "url")
+
         def __init__(self, text, texttype, url=None):
             self.text = text
             self.texttype = texttype
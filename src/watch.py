@@ -0,0 +1,261 @@
+import os
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from assets import scan_files, sync_static
+from build_engine import build_pages, collect_pages, page_output
+from depgraph import affected_sources
+from fingerprint import fingerprint_assets
+from images import build_images
+from linkcheck import check_links
+from listings import build_listings
+from postprocess import postprocess
+
+POLL_INTERVAL = 0.5
+DEBOUNCE_DELAY = 0.3
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    "<script>new EventSource(\"" + LIVE_RELOAD_PATH + "\")"
+    ".addEventListener(\"reload\", function () { location.reload(); });</script>"
+)
+
+
+def snapshot(paths):
+    # Stat polling: the standard library has no inotify binding, and a scandir pass per tick is
+    # cheap next to a rebuild. Directories are walked, plain files are stat'ed directly.
+    state = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for relative_path, stat in scan_files(path).items():
+                state[os.path.join(path, relative_path)] = (stat.st_mtime_ns, stat.st_size)
+        elif os.path.exists(path):
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+def diff_snapshots(old, new):
+    changed = {path for path, state in new.items() if old.get(path) != state}
+    changed.update(path for path in old if path not in new)
+    return changed
+
+
+def watch_changes(take_snapshot, interval=POLL_INTERVAL, debounce=DEBOUNCE_DELAY, stop=None, sleep=time.sleep):
+    previous = take_snapshot()
+    while stop is None or not stop.is_set():
+        sleep(interval)
+        current = take_snapshot()
+        changed = diff_snapshots(previous, current)
+        if not changed:
+            continue
+
+        # Editors and git checkouts touch files in bursts, wait for things to settle down
+        while True:
+            sleep(debounce)
+            latest = take_snapshot()
+            more = diff_snapshots(current, latest)
+            if not more:
+                break
+            changed |= more
+            current = latest
+
+        previous = current
+        yield changed
+
+
+class LiveReload:
+
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+def inject_live_reload(html):
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + LIVE_RELOAD_SCRIPT
+    return html[:index] + LIVE_RELOAD_SCRIPT + html[index:]
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+
+    def __init__(self, *args, live_reload=None, **kwargs):
+        self.live_reload = live_reload
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.path == LIVE_RELOAD_PATH:
+            return self.stream_reload_events()
+
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            if not self.path.split("?", 1)[0].endswith("/"):
+                return super().do_GET()
+            path = os.path.join(path, "index.html")
+        if not path.endswith(".html") or not os.path.isfile(path):
+            return super().do_GET()
+
+        with open(path, "r", encoding="utf-8") as file:
+            body = inject_live_reload(file.read()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_reload_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        version = self.live_reload.version
+        try:
+            while True:
+                latest = self.live_reload.wait(version, 15)
+                if latest == version:
+                    self.wfile.write(b": keepalive\n\n")
+                else:
+                    version = latest
+                    self.wfile.write(b"event: reload\ndata: reload\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_dev_server(directory, port, live_reload):
+    handler = partial(DevRequestHandler, directory=directory, live_reload=live_reload)
+    server = ThreadingHTTPServer(("localhost", port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+class DevBuilder:
+
+    def __init__(self, config, manifest, *, index=None, assets=None, images=None, image_options=None,
+                 link_assets=False, **build_options):
+        # Paths and site settings come from the SiteConfig, what the first build produced is passed
+        # by keyword, and build_options go straight through to build_pages
+        self.content_directory = config.content
+        self.static_directory = config.static
+        self.template_path = config.template
+        self.docs_directory = config.output
+        self.manifest = manifest
+        self.base_path = config.base_path
+        self.jobs = config.jobs
+        self.index = index
+        self.listing_sections = config.listing_sections
+        self.listing_page_size = config.listing_page_size
+        self.listings = None
+        self.fingerprint = config.fingerprint
+        self.assets = assets or {}
+        self.link_assets = link_assets
+        self.images = images or {}
+        # build_images keyword arguments, None when responsive images are off
+        self.image_options = image_options
+        self.minify = config.minify
+        self.compress = config.compress
+        self.build_options = build_options
+
+    def watched_paths(self):
+        return [self.content_directory, self.static_directory, self.template_path]
+
+    def rebuild(self, changes):
+        content_root = os.path.join(self.content_directory, "")
+        static_root = os.path.join(self.static_directory, "")
+        content_changes = sorted(path for path in changes if path.startswith(content_root))
+        static_changes = [os.path.relpath(path, self.static_directory) for path in changes
+                          if path.startswith(static_root)]
+
+        if static_changes:
+            sync_static(self.static_directory, self.docs_directory, self.manifest, link=self.link_assets)
+            if self.fingerprint:
+                self.assets = fingerprint_assets(self.static_directory, self.docs_directory, self.manifest,
+                                                 link=self.link_assets)
+            if self.image_options is not None:
+                self.images, _ = build_images(self.static_directory, self.docs_directory, manifest=self.manifest,
+                                              **self.image_options)
+
+        if self.template_path in changes or (self.fingerprint and static_changes):
+            # Every page embeds the template, so this is the one change that rebuilds everything.
+            # A new fingerprint for an asset the template references changes the template too,
+            # build_pages sorts out which pages that actually makes stale
+            pages = collect_pages(self.content_directory, self.docs_directory)
+        else:
+            # The changed pages plus whatever the dependency graph says uses them or the changed assets
+            sources = affected_sources(self.manifest, content_changes, static_changes)
+            pages = [(source, page_output(source, self.content_directory, self.docs_directory))
+                     for source in sources if os.path.isfile(source)]
+
+        results = build_pages(pages, self.template_path, self.base_path, self.jobs, self.manifest,
+                              index=self.index, assets=self.assets, images=self.images, minify=self.minify,
+                              **self.build_options)
+        deleted = [source for source in content_changes if not os.path.exists(source)]
+        removed = self.manifest.remove_pages(deleted, self.docs_directory)
+        written = [result.output for result in results if result.ok and not result.skipped]
+        if self.index is not None:
+            self.index.remove(deleted)
+            if self.listing_sections:
+                self.listings = build_listings(self.index, self.manifest, self.template_path, self.content_directory,
+                                               self.docs_directory, self.base_path, self.listing_sections,
+                                               page_size=self.listing_page_size, assets=self.assets,
+                                               minify=self.minify)
+                removed += self.listings.removed
+                written += self.listings.written
+            self.index.save()
+
+        if self.minify or self.compress or self.manifest.processed:
+            # Rewritten pages are minified and compressed again and removed ones lose their siblings.
+            # A static change may have copied any asset, so that one goes over the whole output
+            paths = None
+            if not static_changes:
+                paths = [os.path.relpath(output, self.docs_directory) for output in written + removed]
+            postprocess(self.docs_directory, self.manifest, self.minify, self.compress, self.jobs, paths)
+        self.manifest.save()
+        return results, removed
+
+
+def serve_and_watch(builder, port, interval=POLL_INTERVAL, debounce=DEBOUNCE_DELAY):
+    live_reload = LiveReload()
+    server = start_dev_server(builder.docs_directory, port, live_reload)
+    print (f" Serving {builder.docs_directory} at http://localhost:{server.server_address[1]}/")
+    try:
+        for changes in watch_changes(lambda: snapshot(builder.watched_paths()), interval, debounce):
+            results, removed = builder.rebuild(changes)
+            for result in results:
+                if result.skipped:
+                    continue
+                if result.ok:
+                    print (f" Rebuilt {result.output}")
+                else:
+                    print (f" Failed to generate page from {result.source}:\n{result.error}")
+            if builder.listings is not None:
+                for output in builder.listings.written:
+                    print (f" Rebuilt {output}")
+            for output in removed:
+                print (f" Removed stale page {output}")
+            if builder.index is not None:
+                for link in check_links(builder.index, builder.manifest.assets, builder.docs_directory,
+                                        builder.manifest.listings):
+                    print (f" {link}")
+            live_reload.notify()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()